@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from rebuild_leaderboard import ROOT, find_runs
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+from profiling import Profiler, add_profile_args  # noqa: E402
+
+
+# Set bits per byte value; fallback for numpy < 2.0, which has no np.bitwise_count.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits summed over the last axis of a uint64 array."""
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+def _parse_predictions(raw: bytes) -> tuple[np.ndarray, np.ndarray] | None:
+    """(graph_id, target) columns of a plain two-column integer CSV, or None to fall back to pandas."""
+
+    header, _, body = raw.partition(b"\n")
+    columns = [c.strip() for c in header.decode("utf-8-sig").split(",")]
+    if sorted(columns) != ["graph_id", "target"]:
+        return None
+    # Blank lines are skipped like pandas does; every other row must hold exactly two fields.
+    lines = [line for line in body.splitlines() if line.strip()]
+    if any(line.count(b",") != 1 for line in lines):
+        return None
+    try:
+        values = np.array(b",".join(lines).split(b",")).astype(np.int64)
+    except ValueError:
+        return None
+    if values.size != 2 * len(lines):
+        return None
+    values = values.reshape(-1, 2)
+    id_col = columns.index("graph_id")
+    return values[:, id_col], values[:, 1 - id_col]
+
+
+def aligned_labels(pred_path: Path, test_ids: np.ndarray, id_order: np.ndarray | None = None) -> np.ndarray:
+    """Predicted targets in test-id order; missing or non-integer predictions become -1.
+
+    Well-formed files skip pandas: the columns are split straight from the bytes and
+    scattered into a preallocated row by position in test_ids (first occurrence wins).
+    """
+
+    parsed = _parse_predictions(pred_path.read_bytes())
+    if parsed is None:
+        preds = pd.read_csv(pred_path)
+        targets = pd.to_numeric(preds.drop_duplicates("graph_id").set_index("graph_id")["target"], errors="coerce")
+        return targets.reindex(test_ids).fillna(-1).to_numpy(dtype=np.int64)
+
+    ids, targets = parsed
+    order = np.argsort(test_ids) if id_order is None else id_order
+    sorted_ids = test_ids[order]
+    pos = np.minimum(np.searchsorted(sorted_ids, ids), max(sorted_ids.shape[0] - 1, 0))
+    known = sorted_ids[pos] == ids if sorted_ids.shape[0] else np.zeros(ids.shape[0], dtype=bool)
+    out = np.full(test_ids.shape[0], -1, dtype=np.int64)
+    # Reversed so earlier rows overwrite later duplicates.
+    out[order[pos[known]][::-1]] = targets[known][::-1]
+    return out
+
+
+def pack_fingerprints(labels: dict[str, np.ndarray]) -> np.ndarray:
+    """One row per run: one-hot predictions of every dataset, bit-packed into uint64 words.
+
+    labels maps dataset -> (runs x test graphs) targets. Two runs differing on d predictions
+    are 2*d bits apart; an invalid prediction (-1) is an all-zero one-hot.
+    """
+
+    blocks = []
+    for matrix in labels.values():
+        classes = np.unique(matrix[matrix >= 0])
+        onehot = matrix[:, :, None] == classes[None, None, :]
+        blocks.append(onehot.reshape(matrix.shape[0], -1))
+    bits = np.concatenate(blocks, axis=1) if blocks else np.zeros((0, 0), dtype=bool)
+    packed = np.packbits(bits, axis=1)
+    pad = (-packed.shape[1]) % 8
+    packed = np.pad(packed, ((0, 0), (0, pad)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def exact_duplicates(fingerprints: np.ndarray) -> list[list[int]]:
+    """Groups (of run indices) whose fingerprints hash identically."""
+
+    groups: dict[str, list[int]] = {}
+    for i, row in enumerate(fingerprints):
+        groups.setdefault(hashlib.sha256(row.tobytes()).hexdigest(), []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def near_duplicates(
+    fingerprints: np.ndarray, groups: np.ndarray, max_bits: int, block_rows: int = 256
+) -> list[tuple[int, int, int]]:
+    """Pairs (i, j, hamming_bits) with i < j, different groups and a distance of at most max_bits.
+
+    Distances come from XOR + popcount of the packed words, block_rows runs against all
+    later runs at a time, so memory stays bounded for thousands of runs.
+    """
+
+    pairs: list[tuple[int, int, int]] = []
+    n_runs = fingerprints.shape[0]
+    for start in range(0, n_runs, block_rows):
+        stop = min(start + block_rows, n_runs)
+        distances = _popcount(fingerprints[start:stop, None, :] ^ fingerprints[None, start:, :])
+        rows = np.arange(start, stop)[:, None]
+        cols = np.arange(start, n_runs)[None, :]
+        hit = (distances <= max_bits) & (cols > rows) & (groups[rows] != groups[cols])
+        for i, j in zip(*np.nonzero(hit)):
+            pairs.append((int(start + i), int(start + j), int(distances[i, j])))
+    return pairs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Find identical and near-identical prediction files submitted by different teams"
+    )
+    parser.add_argument(
+        "--max-diff-frac",
+        type=float,
+        default=0.01,
+        help="Flag cross-team pairs whose predictions differ on at most this fraction of all test graphs.",
+    )
+    parser.add_argument("--json", type=Path, default=None, help="Also write the findings to this JSON file.")
+    parser.add_argument("--fail", action="store_true", help="Exit with status 1 when duplicates are found.")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args, command="detect_duplicate_submissions")
+
+    runs = find_runs()
+    if len(runs) < 2:
+        print(f"OK: {len(runs)} complete run(s), nothing to compare")
+        profiler.finish()
+        return 0
+
+    with profiler.stage("load"):
+        test_ids = {
+            dataset: pd.read_csv(ROOT / "data" / dataset / "test.csv")["graph_id"].to_numpy() for dataset in dataset_names()
+        }
+        labels = {}
+        for dataset, ids in test_ids.items():
+            order = np.argsort(ids)
+            labels[dataset] = np.stack([aligned_labels(preds[dataset], ids, order) for preds, _meta, _run_dir in runs])
+
+    with profiler.stage("compare"):
+        fingerprints = pack_fingerprints(labels)
+        run_names = [f"{run_dir.parent.name}/{run_dir.name}" for _preds, _meta, run_dir in runs]
+        teams = np.array([run_dir.parent.name for _preds, _meta, run_dir in runs])
+        n_predictions = sum(ids.shape[0] for ids in test_ids.values())
+        max_diff = int(args.max_diff_frac * n_predictions)
+
+        exact = [
+            [run_names[i] for i in members] for members in exact_duplicates(fingerprints) if len(set(teams[members])) > 1
+        ]
+        near = [
+            {"runs": [run_names[i], run_names[j]], "differing_predictions": (bits + 1) // 2}
+            for i, j, bits in near_duplicates(fingerprints, teams, 2 * max_diff)
+            if bits > 0
+        ]
+
+    for members in exact:
+        print(f"EXACT DUPLICATE: {', '.join(members)}")
+    for pair in near:
+        print(
+            f"NEAR DUPLICATE: {pair['runs'][0]} ~ {pair['runs'][1]} "
+            f"({pair['differing_predictions']}/{n_predictions} predictions differ)"
+        )
+    if not exact and not near:
+        print(f"OK: no duplicate submissions across {len(runs)} runs (max_diff={max_diff}/{n_predictions})")
+
+    if args.json is not None:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        findings = {"runs": len(runs), "max_diff": max_diff, "n_predictions": n_predictions, "exact": exact, "near": near}
+        args.json.write_text(json.dumps(findings, indent=2) + "\n", encoding="utf-8")
+
+    profiler.finish()
+    return 1 if args.fail and (exact or near) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
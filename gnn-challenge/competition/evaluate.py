@@ -1,18 +1,31 @@
 from __future__ import annotations
 
 import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
 
-from metrics import macro_f1
+from metrics import classification_report
 from validate_submission import validate_submission
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+from profiling import Profiler, add_profile_args  # noqa: E402
+
 
 REQUIRED_COLUMNS = {"graph_id", "target"}
 
 
 def score_submission(pred_path: Path, dataset: str, labels_path: Path) -> float:
+    return evaluate_submission(pred_path, dataset, labels_path)["macro_f1"]
+
+
+def evaluate_submission(pred_path: Path, dataset: str, labels_path: Path) -> dict:
+    """Validates a predictions file and returns its full metrics report (see metrics.classification_report)."""
+
     root = Path(__file__).resolve().parents[1]
     test_path = root / "data" / dataset / "test.csv"
     validate_submission(pred_path, dataset, test_path)
@@ -22,6 +35,17 @@ def score_submission(pred_path: Path, dataset: str, labels_path: Path) -> float:
 
     labels = pd.read_csv(labels_path)
     preds = pd.read_csv(pred_path)
+    return evaluate_predictions(preds, labels)
+
+
+def score_predictions(preds: pd.DataFrame, labels: pd.DataFrame) -> float:
+    """Macro F1 of an already-validated predictions frame against a labels frame."""
+
+    return evaluate_predictions(preds, labels)["macro_f1"]
+
+
+def evaluate_predictions(preds: pd.DataFrame, labels: pd.DataFrame) -> dict:
+    """Metrics report of an already-validated predictions frame, from one confusion matrix."""
 
     if set(labels.columns) != REQUIRED_COLUMNS:
         raise ValueError(f"labels file must contain exactly {sorted(REQUIRED_COLUMNS)}")
@@ -30,18 +54,70 @@ def score_submission(pred_path: Path, dataset: str, labels_path: Path) -> float:
     if len(merged) != len(labels):
         raise ValueError("Prediction IDs do not fully match hidden labels")
 
-    return macro_f1(merged["target_true"], merged["target_pred"])
+    return classification_report(merged["target_true"].to_numpy(), merged["target_pred"].to_numpy())
+
+
+def score_run(pred_paths: dict[str, Path], labels_dir: Path) -> dict[str, float]:
+    """Scores one run's per-dataset prediction files concurrently against <labels_dir>/<dataset>_test_labels.csv."""
+
+    return {dataset: report["macro_f1"] for dataset, report in evaluate_run(pred_paths, labels_dir).items()}
+
+
+def evaluate_run(pred_paths: dict[str, Path], labels_dir: Path) -> dict[str, dict]:
+    """Like score_run, but returns each dataset's full metrics report."""
+
+    with ThreadPoolExecutor(max_workers=max(len(pred_paths), 1)) as pool:
+        futures = {
+            dataset: pool.submit(evaluate_submission, pred_path, dataset, labels_dir / f"{dataset}_test_labels.csv")
+            for dataset, pred_path in pred_paths.items()
+        }
+        return {dataset: future.result() for dataset, future in futures.items()}
+
+
+def combined_score(per_dataset_scores: dict[str, float]) -> float:
+    """Official leaderboard score: the mean Macro F1 over all configured datasets."""
+
+    return sum(per_dataset_scores[d] for d in dataset_names()) / len(dataset_names())
+
+
+def add_report_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--report",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="JSON_PATH",
+        help="Private metrics report (per-class stats, confusion matrix, balanced accuracy, MCC) as JSON "
+        "to JSON_PATH, or stderr when no path is given. Never part of the public leaderboard.",
+    )
+
+
+def write_report(report: dict, target: str) -> None:
+    text = json.dumps(report, indent=2)
+    if target == "-":
+        print(text, file=sys.stderr)
+        return
+    path = Path(target)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text + "\n", encoding="utf-8")
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Evaluate graph classification submission")
     parser.add_argument("predictions", type=Path)
     parser.add_argument("labels", type=Path, help="Private labels CSV for the selected dataset")
-    parser.add_argument("--dataset", required=True, choices=["proteins", "mutag"])
+    parser.add_argument("--dataset", required=True, choices=dataset_names())
+    add_report_arg(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
-
-    score = score_submission(args.predictions, args.dataset, args.labels)
-    print(f"SCORE={score:.8f}")
+    profiler = Profiler.from_args(args, command="evaluate")
+
+    with profiler.stage("score"):
+        report = evaluate_submission(args.predictions, args.dataset, args.labels)
+    print(f"SCORE={report['macro_f1']:.8f}")
+    if args.report is not None:
+        write_report({"dataset": args.dataset, **report}, args.report)
+    profiler.finish()
     return 0
 
 
@@ -1,7 +1,77 @@
 from __future__ import annotations
 
-from sklearn.metrics import f1_score
+import numpy as np
+
+
+def _class_ids(y, name: str) -> np.ndarray:
+    # Like sklearn, refuse continuous targets instead of treating each distinct float as a class.
+    y = np.asarray(y)
+    if y.dtype.kind == "f" and not np.array_equal(y, np.round(y)):
+        raise ValueError(f"{name} must contain integer class ids, got non-integer values")
+    return y
+
+
+def confusion_matrix(y_true, y_pred) -> tuple[np.ndarray, np.ndarray]:
+    """Confusion matrix (rows: true, columns: predicted) over the classes seen in either input, via one bincount."""
+
+    y_true = _class_ids(y_true, "y_true")
+    y_pred = _class_ids(y_pred, "y_pred")
+    classes = np.union1d(y_true, y_pred)
+    k = classes.shape[0]
+    codes = np.searchsorted(classes, y_true) * k + np.searchsorted(classes, y_pred)
+    return np.bincount(codes, minlength=k * k).reshape(k, k), classes
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    # sklearn's zero_division=0 convention: an empty denominator scores 0.
+    return np.divide(num, den, out=np.zeros(num.shape, dtype=float), where=den > 0)
+
+
+def classification_report(y_true, y_pred) -> dict:
+    """All evaluation metrics derived from a single confusion matrix.
+
+    Macro F1 (the official score) matches sklearn's f1_score(average="macro").
+    """
+
+    cm, classes = confusion_matrix(y_true, y_pred)
+    tp = np.diag(cm).astype(float)
+    support = cm.sum(axis=1).astype(float)
+    predicted = cm.sum(axis=0).astype(float)
+    n = float(cm.sum())
+
+    precision = _ratio(tp, predicted)
+    recall = _ratio(tp, support)
+    f1 = _ratio(2.0 * tp, support + predicted)
+
+    # Multiclass MCC (Gorodkin's R_K), 0 when undefined.
+    correct = tp.sum()
+    denom = np.sqrt((n * n - (predicted**2).sum()) * (n * n - (support**2).sum()))
+    mcc = float((correct * n - (predicted * support).sum()) / denom) if denom > 0 else 0.0
+
+    return {
+        "n": int(n),
+        "accuracy": float(correct / n) if n else 0.0,
+        "macro_f1": float(f1.mean()) if f1.size else 0.0,
+        # Single-label multiclass: micro F1 equals accuracy.
+        "micro_f1": float(correct / n) if n else 0.0,
+        "weighted_f1": float((f1 * support).sum() / n) if n else 0.0,
+        "balanced_accuracy": float(recall[support > 0].mean()) if (support > 0).any() else 0.0,
+        "mcc": mcc,
+        "classes": [c.item() for c in classes],
+        "confusion_matrix": cm.tolist(),
+        "per_class": [
+            {
+                "class": c.item(),
+                "precision": float(p),
+                "recall": float(r),
+                "f1": float(f),
+                "support": int(s),
+                "predicted": int(q),
+            }
+            for c, p, r, f, s, q in zip(classes, precision, recall, f1, support, predicted)
+        ],
+    }
 
 
 def macro_f1(y_true, y_pred) -> float:
-    return float(f1_score(y_true, y_pred, average="macro"))
+    return classification_report(y_true, y_pred)["macro_f1"]
@@ -2,9 +2,14 @@ from __future__ import annotations
 
 import csv
 import json
+import sys
 from pathlib import Path
 
-from evaluate import score_submission
+from evaluate import combined_score, score_run
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+from profiling import Profiler, add_profile_args  # noqa: E402
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -12,8 +17,10 @@ INBOX = ROOT / "submissions" / "inbox"
 LEADERBOARD_CSV = ROOT / "leaderboard" / "leaderboard.csv"
 
 
-def find_runs() -> list[tuple[Path, Path, Path, Path]]:
-    runs: list[tuple[Path, Path, Path, Path]] = []
+def find_runs() -> list[tuple[dict[str, Path], Path, Path]]:
+    """Complete runs as (prediction file per dataset, metadata.json, run dir)."""
+
+    runs: list[tuple[dict[str, Path], Path, Path]] = []
     if not INBOX.exists():
         return runs
 
@@ -23,11 +30,10 @@ def find_runs() -> list[tuple[Path, Path, Path, Path]]:
         for run_dir in sorted(team_dir.iterdir()):
             if not run_dir.is_dir():
                 continue
-            pred_proteins = run_dir / "predictions_proteins.csv"
-            pred_mutag = run_dir / "predictions_mutag.csv"
+            preds = {dataset: run_dir / f"predictions_{dataset}.csv" for dataset in dataset_names()}
             meta = run_dir / "metadata.json"
-            if pred_proteins.exists() and pred_mutag.exists() and meta.exists():
-                runs.append((pred_proteins, pred_mutag, meta, run_dir))
+            if all(p.exists() for p in preds.values()) and meta.exists():
+                runs.append((preds, meta, run_dir))
     return runs
 
 
@@ -50,41 +56,45 @@ def main() -> int:
 
     parser = argparse.ArgumentParser(description="Recompute leaderboard.csv from all submissions/inbox runs")
     parser.add_argument("--labels-dir", required=True, type=Path)
+    add_profile_args(parser)
     args = parser.parse_args()
+    profiler = Profiler.from_args(args, command="rebuild_leaderboard")
 
     rows = []
-    parsed_runs: list[tuple[Path, Path, str]] = []
+    parsed_runs: list[tuple[dict[str, Path], str]] = []
     team_counts: dict[str, int] = {}
 
-    for pred_proteins, pred_mutag, meta, _run_dir in find_runs():
-        metadata = json.loads(meta.read_text(encoding="utf-8"))
-        team = str(metadata.get("team", "")).strip()
-        if not team:
-            continue
+    with profiler.stage("load"):
+        for preds, meta, _run_dir in find_runs():
+            metadata = json.loads(meta.read_text(encoding="utf-8"))
+            team = str(metadata.get("team", "")).strip()
+            if not team:
+                continue
 
-        team_counts[team] = team_counts.get(team, 0) + 1
-        parsed_runs.append((pred_proteins, pred_mutag, team))
+            team_counts[team] = team_counts.get(team, 0) + 1
+            parsed_runs.append((preds, team))
 
     dup = [t for t, c in team_counts.items() if c > 1]
     if dup:
         raise ValueError(f"Submission policy violation: only one attempt per participant is allowed. Duplicate teams: {dup}")
 
-    for pred_proteins, pred_mutag, _team in parsed_runs:
-        proteins_score = float(score_submission(pred_proteins, "proteins", args.labels_dir / "proteins_test_labels.csv"))
-        mutag_score = float(score_submission(pred_mutag, "mutag", args.labels_dir / "mutag_test_labels.csv"))
-        combined = (proteins_score + mutag_score) / 2.0
-        rows.append({"score": f"{combined:.8f}"})
+    with profiler.stage("score"):
+        for preds, _team in parsed_runs:
+            combined = combined_score(score_run(preds, args.labels_dir))
+            rows.append({"score": f"{combined:.8f}"})
 
     LEADERBOARD_CSV.parent.mkdir(parents=True, exist_ok=True)
     ranked_rows = _kaggle_competition_ranks(rows)
     fieldnames = ["rank", "score"]
 
-    with LEADERBOARD_CSV.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(ranked_rows)
+    with profiler.stage("write"):
+        with LEADERBOARD_CSV.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(ranked_rows)
 
     print(f"Wrote {LEADERBOARD_CSV} with {len(ranked_rows)} rows")
+    profiler.finish()
     return 0
 
 
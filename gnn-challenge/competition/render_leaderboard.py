@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import argparse
 import csv
 import json
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+from profiling import Profiler, add_profile_args  # noqa: E402
+
 
 ROOT = Path(__file__).resolve().parents[1]
 CSV_PATH = ROOT / "leaderboard" / "leaderboard.csv"
@@ -32,7 +38,9 @@ def _render(rows: list[dict]) -> str:
     lines = []
     lines.append("# Leaderboard\n\n")
     lines.append("Public leaderboard exposes only final **rank** and **combined score**.\n\n")
-    lines.append("Combined score = (MacroF1_proteins + MacroF1_mutag) / 2.\n\n")
+    names = dataset_names()
+    terms = " + ".join(f"MacroF1_{name}" for name in names)
+    lines.append(f"Combined score = ({terms}) / {len(names)}.\n\n")
     lines.append("| Rank | Combined Score |\n")
     lines.append("|---:|---:|\n")
     for row in rows:
@@ -43,14 +51,22 @@ def _render(rows: list[dict]) -> str:
 
 
 def main() -> int:
-    rows = _read_rows()
+    parser = argparse.ArgumentParser(description="Render leaderboard.csv to markdown and docs JSON")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args, command="render_leaderboard")
+
+    with profiler.stage("load"):
+        rows = _read_rows()
     md = _render(rows)
-    MD_PATH.parent.mkdir(parents=True, exist_ok=True)
-    MD_PATH.write_text(md, encoding="utf-8")
-    LEGACY_MD_PATH.write_text(md, encoding="utf-8")
-    DOCS_JSON_PATH.parent.mkdir(parents=True, exist_ok=True)
-    DOCS_JSON_PATH.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    with profiler.stage("write"):
+        MD_PATH.parent.mkdir(parents=True, exist_ok=True)
+        MD_PATH.write_text(md, encoding="utf-8")
+        LEGACY_MD_PATH.write_text(md, encoding="utf-8")
+        DOCS_JSON_PATH.parent.mkdir(parents=True, exist_ok=True)
+        DOCS_JSON_PATH.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"Rendered {MD_PATH} and {LEGACY_MD_PATH}")
+    profiler.finish()
     return 0
 
 
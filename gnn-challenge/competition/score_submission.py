@@ -2,9 +2,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from pathlib import Path
 
-from evaluate import score_submission
+from evaluate import add_report_arg, combined_score, evaluate_run, write_report
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+from profiling import Profiler, add_profile_args  # noqa: E402
 
 
 ALLOWED_MODEL_TYPES = {"human", "llm-only", "human+llm"}
@@ -17,24 +22,44 @@ def _require(metadata: dict, key: str) -> str:
     return value
 
 
+def efficiency(score: float, metadata: dict) -> dict:
+    """Score per runtime minute plus the resources measured by run_and_record.py, when present."""
+
+    try:
+        minutes = float(metadata.get("runtime_minutes"))
+    except (TypeError, ValueError):
+        minutes = float("nan")
+    measured = {k: v for k, v in (metadata.get("measured") or {}).items() if k != "commands"}
+    return {
+        "runtime_minutes": minutes if minutes == minutes else None,
+        "score_per_minute": round(score / minutes, 8) if minutes > 0 else None,
+        "runtime_measured": bool(measured),
+        **measured,
+    }
+
+
 def _prediction_file(run_dir: Path, dataset: str) -> Path:
     return run_dir / f"predictions_{dataset}.csv"
 
 
 def main() -> int:
-    parser = argparse.ArgumentParser(description="Score one PR submission (combined proteins+mutag)")
+    parser = argparse.ArgumentParser(description="Score one PR submission (combined over all configured datasets)")
     parser.add_argument("--run-dir", required=True, type=Path)
     parser.add_argument("--metadata", required=True, type=Path)
     parser.add_argument("--labels-dir", required=True, type=Path)
     parser.add_argument("--pr-number", default="")
+    add_report_arg(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    profiler = Profiler.from_args(args, command="score_submission")
 
     if not args.metadata.exists():
         raise FileNotFoundError(f"Missing metadata file: {args.metadata}")
     if not args.run_dir.exists():
         raise FileNotFoundError(f"Missing run directory: {args.run_dir}")
 
-    metadata = json.loads(args.metadata.read_text(encoding="utf-8"))
+    with profiler.stage("load"):
+        metadata = json.loads(args.metadata.read_text(encoding="utf-8"))
     _require(metadata, "team")
 
     _require(metadata, "model")
@@ -44,23 +69,23 @@ def main() -> int:
 
     _require(metadata, "runtime_minutes")
 
-    per_dataset_scores: dict[str, float] = {}
-    for dataset in ["proteins", "mutag"]:
-        pred_path = _prediction_file(args.run_dir, dataset)
+    pred_paths = {dataset: _prediction_file(args.run_dir, dataset) for dataset in dataset_names()}
+    for pred_path in pred_paths.values():
         if not pred_path.exists():
             raise FileNotFoundError(f"Missing prediction file: {pred_path}")
-        labels_path = args.labels_dir / f"{dataset}_test_labels.csv"
-        per_dataset_scores[dataset] = float(score_submission(pred_path, dataset, labels_path))
 
-    combined_score = (per_dataset_scores["proteins"] + per_dataset_scores["mutag"]) / 2.0
+    with profiler.stage("score"):
+        reports = evaluate_run(pred_paths, args.labels_dir)
+    per_dataset_scores = {dataset: report["macro_f1"] for dataset, report in reports.items()}
 
-    result = {
-        "score": round(float(combined_score), 8),
-        "proteins_score": round(float(per_dataset_scores["proteins"]), 8),
-        "mutag_score": round(float(per_dataset_scores["mutag"]), 8),
-    }
+    result = {"score": round(float(combined_score(per_dataset_scores)), 8)}
+    for dataset, score in per_dataset_scores.items():
+        result[f"{dataset}_score"] = round(float(score), 8)
 
     print(json.dumps(result, ensure_ascii=False))
+    if args.report is not None:
+        write_report({**result, "efficiency": efficiency(result["score"], metadata), "datasets": reports}, args.report)
+    profiler.finish()
     return 0
 
 
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import sys
+from pathlib import Path
+
+
+# Deliberately stdlib-only at import time: when a daemon is running, a request costs
+# interpreter startup plus one localhost round trip, without importing pandas/sklearn.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("GNN_SCORING_DAEMON_PORT", "8765"))
+CONNECT_TIMEOUT_S = 0.25
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def labels_path(dataset: str, labels_dir: Path | None) -> Path:
+    """Private labels file for a dataset: <labels_dir>/<dataset>_test_labels.csv, else data/<dataset>/test_labels.csv."""
+
+    if labels_dir is not None:
+        return labels_dir / f"{dataset}_test_labels.csv"
+    return ROOT / "data" / dataset / "test_labels.csv"
+
+
+def request_daemon(action: str, payload: dict, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> dict | None:
+    """Sends one request to a running scoring daemon. Returns None when no daemon is listening."""
+
+    conn = http.client.HTTPConnection(host, port, timeout=CONNECT_TIMEOUT_S)
+    try:
+        conn.connect()
+    except OSError:
+        return None
+    try:
+        # Scoring itself may take longer than the connect probe.
+        conn.sock.settimeout(None)
+        conn.request("POST", f"/{action}", body=json.dumps(payload), headers={"Content-Type": "application/json"})
+        return json.loads(conn.getresponse().read().decode("utf-8"))
+    finally:
+        conn.close()
+
+
+def _run_in_process(action: str, payload: dict) -> dict:
+    from evaluate import score_submission
+    from validate_submission import validate_submission
+
+    pred_path = Path(payload["predictions"])
+    dataset = str(payload["dataset"])
+    test_path = ROOT / "data" / dataset / "test.csv"
+    try:
+        if action == "validate":
+            validate_submission(pred_path, dataset, test_path)
+            return {"ok": True}
+        labels_dir = Path(payload["labels_dir"]) if payload.get("labels_dir") else None
+        return {"ok": True, "score": float(score_submission(pred_path, dataset, labels_path(dataset, labels_dir)))}
+    except (FileNotFoundError, ValueError) as exc:
+        return {"ok": False, "error": str(exc)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Validate or score a predictions file via the local scoring daemon (falls back to in-process)"
+    )
+    parser.add_argument("action", choices=["validate", "score"])
+    parser.add_argument("predictions", type=Path)
+    parser.add_argument("--dataset", required=True, help="Dataset name from competition/config.yaml")
+    parser.add_argument(
+        "--labels-dir",
+        type=Path,
+        default=None,
+        help="Directory with <dataset>_test_labels.csv; overrides the daemon's --labels-dir (default: data/<dataset>/)",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-daemon", action="store_true", help="Always run in-process.")
+    args = parser.parse_args()
+
+    payload = {"predictions": str(args.predictions.resolve()), "dataset": args.dataset}
+    if args.labels_dir is not None:
+        payload["labels_dir"] = str(args.labels_dir.resolve())
+
+    result = None if args.no_daemon else request_daemon(args.action, payload, args.host, args.port)
+    if result is None:
+        result = _run_in_process(args.action, payload)
+
+    if not result.get("ok"):
+        print(f"ERROR: {result.get('error', 'unknown error')}", file=sys.stderr)
+        return 1
+    if args.action == "validate":
+        print("VALID SUBMISSION")
+    else:
+        print(f"SCORE={float(result['score']):.8f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+
+from evaluate import score_predictions
+from scoring_client import DEFAULT_HOST, DEFAULT_PORT, ROOT, labels_path
+from validate_submission import check_predictions
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+
+
+class ScoringState:
+    """Test ids and private labels kept in memory, reloaded when the file on disk changes."""
+
+    def __init__(self, labels_dir: Path | None) -> None:
+        self.labels_dir = labels_dir
+        self._lock = threading.Lock()
+        self._cache: dict[Path, tuple[float, object]] = {}
+
+    def _load(self, path: Path, parse):
+        if not path.exists():
+            raise FileNotFoundError(f"Missing file: {path}")
+        mtime = path.stat().st_mtime
+        with self._lock:
+            hit = self._cache.get(path)
+            if hit is not None and hit[0] == mtime:
+                return hit[1]
+            value = parse(pd.read_csv(path))
+            self._cache[path] = (mtime, value)
+            return value
+
+    def test_ids(self, dataset: str) -> list[int]:
+        return self._load(ROOT / "data" / dataset / "test.csv", lambda df: df["graph_id"].tolist())
+
+    def labels(self, dataset: str, labels_dir: Path | None = None) -> pd.DataFrame:
+        """Labels from labels_dir when a client names one, else from the daemon's own directory."""
+
+        return self._load(labels_path(dataset, labels_dir or self.labels_dir), lambda df: df)
+
+    def warm(self) -> None:
+        for dataset in dataset_names():
+            for loader in (self.test_ids, self.labels):
+                try:
+                    loader(dataset)
+                except FileNotFoundError:
+                    pass
+
+    def handle(self, action: str, payload: dict) -> dict:
+        dataset = str(payload.get("dataset", ""))
+        if dataset not in dataset_names():
+            raise ValueError(f"dataset must be one of: {', '.join(dataset_names())}")
+        pred_path = Path(str(payload.get("predictions", "")))
+        if not pred_path.exists():
+            raise FileNotFoundError(f"Missing predictions file: {pred_path}")
+
+        preds = pd.read_csv(pred_path)
+        check_predictions(preds, self.test_ids(dataset))
+        if action == "validate":
+            return {"ok": True}
+        if action == "score":
+            labels_dir = Path(payload["labels_dir"]) if payload.get("labels_dir") else None
+            return {"ok": True, "score": float(score_predictions(preds, self.labels(dataset, labels_dir)))}
+        raise ValueError(f"Unknown action: {action}")
+
+
+def _make_handler(state: ScoringState, verbose: bool) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path == "/health":
+                self._send(200, {"ok": True})
+            else:
+                self._send(404, {"ok": False, "error": f"Unknown path: {self.path}"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+                self._send(200, state.handle(self.path.strip("/"), payload))
+            except (FileNotFoundError, ValueError, KeyError) as exc:
+                self._send(400, {"ok": False, "error": str(exc)})
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002
+            if verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local scoring daemon: keeps test ids and labels loaded between requests")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--labels-dir",
+        type=Path,
+        default=None,
+        help="Directory with <dataset>_test_labels.csv (organizers). Default: data/<dataset>/test_labels.csv",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    state = ScoringState(args.labels_dir)
+    state.warm()
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(state, args.verbose))
+    print(f"Scoring daemon listening on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import json
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+
 
 ROOT = Path(__file__).resolve().parents[1]
 INBOX = ROOT / "submissions" / "inbox"
@@ -23,10 +27,9 @@ def main() -> int:
         for run_dir in sorted(team_dir.iterdir()):
             if not run_dir.is_dir():
                 continue
-            pred_proteins = run_dir / "predictions_proteins.csv"
-            pred_mutag = run_dir / "predictions_mutag.csv"
+            preds = [run_dir / f"predictions_{dataset}.csv" for dataset in dataset_names()]
             meta = run_dir / "metadata.json"
-            if not (pred_proteins.exists() and pred_mutag.exists() and meta.exists()):
+            if not (all(p.exists() for p in preds) and meta.exists()):
                 continue
 
             metadata = json.loads(meta.read_text(encoding="utf-8"))
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import pandas as pd
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "starter_code"))
+from dataset_registry import dataset_names  # noqa: E402
+
 
 REQUIRED_COLUMNS = {"graph_id", "target"}
 
 
 def validate_submission(pred_path: Path, dataset: str, test_path: Path) -> None:
-    if dataset not in {"proteins", "mutag"}:
-        raise ValueError("dataset must be one of: proteins, mutag")
+    names = dataset_names()
+    if dataset not in names:
+        raise ValueError(f"dataset must be one of: {', '.join(names)}")
 
     if not pred_path.exists():
         raise FileNotFoundError(f"Missing predictions file: {pred_path}")
@@ -20,6 +25,11 @@ def validate_submission(pred_path: Path, dataset: str, test_path: Path) -> None:
 
     preds = pd.read_csv(pred_path)
     test = pd.read_csv(test_path)
+    check_predictions(preds, test["graph_id"].tolist())
+
+
+def check_predictions(preds: pd.DataFrame, expected_ids: list[int]) -> None:
+    """Format checks on an already-loaded predictions frame against the expected test ids."""
 
     if set(preds.columns) != REQUIRED_COLUMNS:
         raise ValueError(f"Prediction file must contain exactly {sorted(REQUIRED_COLUMNS)}")
@@ -33,7 +43,9 @@ def validate_submission(pred_path: Path, dataset: str, test_path: Path) -> None:
     if not pd.api.types.is_numeric_dtype(preds["target"]):
         raise ValueError("target must be numeric class ids")
 
-    expected_ids = test["graph_id"].tolist()
+    if (preds["target"] != preds["target"].round()).any():
+        raise ValueError("target must be integer class ids, got non-integer values")
+
     got_ids = preds["graph_id"].tolist()
 
     if len(got_ids) != len(expected_ids):
@@ -46,7 +58,7 @@ def validate_submission(pred_path: Path, dataset: str, test_path: Path) -> None:
 def main() -> int:
     parser = argparse.ArgumentParser(description="Validate submission format for graph challenge")
     parser.add_argument("predictions", type=Path)
-    parser.add_argument("--dataset", required=True, choices=["proteins", "mutag"])
+    parser.add_argument("--dataset", required=True, choices=dataset_names())
     args = parser.parse_args()
 
     root = Path(__file__).resolve().parents[1]
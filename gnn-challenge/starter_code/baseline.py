@@ -1,70 +1,336 @@
 from __future__ import annotations
 
 import argparse
+import json
+import sys
+import time
 from pathlib import Path
 
+import joblib
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import f1_score
 from sklearn.pipeline import Pipeline
 
-from graph_baseline_utils import build_graph_features
+from dataset_registry import dataset_names
+from graph_baseline_utils import (
+    build_graph_features,
+    build_label_count_matrix,
+    data_fingerprint,
+    features_code_hash,
+    memory_report,
+    read_edges,
+    read_nodes,
+    read_split,
+)
+from profiling import Profiler, add_profile_args
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Baseline for the Open GNN Mini-Competition (graph classification).")
-    parser.add_argument("--dataset", choices=["proteins", "mutag"], default="proteins")
-    args = parser.parse_args()
-
-    here = Path(__file__).resolve()
-    data_dir = here.parents[1] / "data" / str(args.dataset)
-    submissions_dir = here.parents[1] / "submissions"
-    submissions_dir.mkdir(parents=True, exist_ok=True)
-
-    nodes = pd.read_csv(data_dir / "nodes.csv")
-    edges = pd.read_csv(data_dir / "edges.csv")
-
-    feats, feature_cols = build_graph_features(nodes, edges)
+CHALLENGE_ROOT = Path(__file__).resolve().parents[1]
+SUBMISSIONS_DIR = CHALLENGE_ROOT / "submissions"
 
-    train = pd.read_csv(data_dir / "train.csv")
-    val = pd.read_csv(data_dir / "val.csv")
-    test = pd.read_csv(data_dir / "test.csv")
-
-    x_train = train.merge(feats, on="graph_id", how="left")[feature_cols]
-    y_train = train["target"]
-    x_val = val.merge(feats, on="graph_id", how="left")[feature_cols]
-    y_val = val["target"]
 
-    model = Pipeline(
+def make_model(n_estimators: int = 400, warm_start: bool = False) -> Pipeline:
+    return Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="median")),
             (
                 "rf",
                 RandomForestClassifier(
-                    n_estimators=400,
+                    n_estimators=n_estimators,
                     random_state=42,
                     n_jobs=-1,
+                    warm_start=warm_start,
                 ),
             ),
         ]
     )
 
-    model.fit(x_train, y_train)
-    y_pred = model.predict(x_val)
-    score = f1_score(y_val, y_pred, average="macro")
+
+def design_matrix(
+    split: pd.DataFrame,
+    feats: pd.DataFrame,
+    feature_cols: list[str],
+    nodes: pd.DataFrame | None = None,
+    hash_width: int | None = None,
+    vocab: np.ndarray | None = None,
+) -> pd.DataFrame | sp.csr_matrix:
+    """Feature rows for a split. With nodes given, appends sparse node-label counts and stays CSR.
+
+    Columns missing from feats (e.g. a label absent after a data re-export) are filled with 0.
+    """
+
+    x = split.merge(feats, on="graph_id", how="left").reindex(columns=feature_cols, fill_value=0.0)
+    if nodes is None:
+        return x
+    counts, _ = build_label_count_matrix(nodes, split["graph_id"].to_numpy(), hash_width, vocab)
+    return sp.hstack([sp.csr_matrix(x.to_numpy(dtype=np.float32)), counts], format="csr")
+
+
+def fit_early_stopping(
+    x_train: pd.DataFrame | sp.csr_matrix,
+    y_train: pd.Series,
+    x_val: pd.DataFrame | sp.csr_matrix,
+    y_val: pd.Series,
+    max_trees: int,
+    step: int,
+    tol: float,
+    patience: int,
+) -> tuple[Pipeline, int, list[tuple[int, float]]]:
+    """Grows the forest `step` trees at a time (warm_start) until validation Macro F1 stops improving.
+
+    Stops after `patience` consecutive increments that fail to beat the best score so far by
+    more than `tol`, then truncates the forest to the best point. Returns the fitted model,
+    its tree count and the (n_trees, val Macro F1) curve.
+    """
+
+    model = make_model(n_estimators=0, warm_start=True)
+    curve: list[tuple[int, float]] = []
+    best = float("-inf")
+    best_n = 0
+    stale = 0
+    n_trees = 0
+    while n_trees < max_trees:
+        n_trees = min(n_trees + step, max_trees)
+        model.set_params(rf__n_estimators=n_trees)
+        model.fit(x_train, y_train)
+        score = float(f1_score(y_val, model.predict(x_val), average="macro"))
+        curve.append((n_trees, score))
+        print(f"  trees={n_trees:4d} val Macro F1={score:.4f}")
+        if score > best + tol:
+            best = score
+            best_n = n_trees
+            stale = 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+
+    # Warm start appends trees, so the first best_n are exactly the forest that scored best.
+    rf = model.named_steps["rf"]
+    rf.estimators_ = rf.estimators_[:best_n]
+    rf.set_params(n_estimators=best_n, warm_start=False)
+    return model, best_n, curve
+
+
+def load_features(
+    data_dir: Path, cache_dir: Path, sparse_labels: bool, motifs: bool, profiler: Profiler
+) -> tuple[pd.DataFrame | None, pd.DataFrame, list[str]]:
+    """Graph features for a prepared dataset, cached under cache_dir.
+
+    The cache is keyed by the content of nodes.csv/edges.csv and the feature code, so a data
+    re-export only rebuilds features. Returns (nodes, feats, feature_cols); nodes is only
+    loaded when the sparse label block needs it.
+    """
+
+    key = f"{data_fingerprint(data_dir, ('nodes.csv', 'edges.csv'))}-{features_code_hash()}"
+    variant = ("sparse" if sparse_labels else "dense") + ("-motifs" if motifs else "")
+    cache_path = cache_dir / f"features-{key}-{variant}.joblib"
+    if cache_path.exists():
+        with profiler.stage("load"):
+            feats, feature_cols = joblib.load(cache_path)
+            nodes = read_nodes(data_dir / "nodes.csv") if sparse_labels else None
+        return nodes, feats, feature_cols
+
+    with profiler.stage("load"):
+        nodes = read_nodes(data_dir / "nodes.csv")
+        edges = read_edges(data_dir / "edges.csv")
+    print(memory_report("nodes", nodes))
+    print(memory_report("edges", edges))
+
+    with profiler.stage("features"):
+        feats, feature_cols = build_graph_features(nodes, edges, label_counts=not sparse_labels, motifs=motifs)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    joblib.dump((feats, feature_cols), cache_path)
+    return nodes, feats, feature_cols
+
+
+def _write_predictions(test: pd.DataFrame, preds, out_path: Path, profiler: Profiler) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with profiler.stage("write"):
+        pd.DataFrame({"graph_id": test["graph_id"].to_numpy(), "target": preds}).to_csv(out_path, index=False)
+    print(f"Wrote: {out_path}")
+
+
+def train(args: argparse.Namespace, profiler: Profiler) -> int:
+    data_dir = CHALLENGE_ROOT / "data" / str(args.dataset)
+    artifact_dir = CHALLENGE_ROOT / "artifacts" / str(args.dataset)
+
+    has_node_labels = "node_label" in pd.read_csv(data_dir / "nodes.csv", nrows=0).columns
+    sparse_labels = (args.sparse_labels or args.label_hash_width is not None) and has_node_labels
+    nodes, feats, feature_cols = load_features(data_dir, artifact_dir, sparse_labels, args.motifs, profiler)
+
+    with profiler.stage("load"):
+        train = read_split(data_dir / "train.csv")
+        val = read_split(data_dir / "val.csv")
+        test = read_split(data_dir / "test.csv")
+
+    label_nodes = nodes if sparse_labels else None
+    vocab = np.unique(nodes["node_label"].to_numpy()) if sparse_labels and not args.label_hash_width else None
+    with profiler.stage("features"):
+        x_train = design_matrix(train, feats, feature_cols, label_nodes, args.label_hash_width, vocab)
+        x_val = design_matrix(val, feats, feature_cols, label_nodes, args.label_hash_width, vocab)
+        x_test = design_matrix(test, feats, feature_cols, label_nodes, args.label_hash_width, vocab)
+    y_train = train["target"]
+    y_val = val["target"]
+
+    if args.early_stopping:
+        with profiler.stage("fit"):
+            fit_start = time.perf_counter()
+            model, n_trees, curve = fit_early_stopping(
+                x_train, y_train, x_val, y_val, args.max_trees, args.trees_step, args.tol, args.patience
+            )
+            fit_seconds = time.perf_counter() - fit_start
+        grown = curve[-1][0]
+        # Per-tree cost includes curve evaluation, so this slightly overestimates each fit's saving.
+        saved = fit_seconds / grown * (args.max_trees - n_trees)
+        print(
+            f"Early stopping: kept best {n_trees}/{args.max_trees} trees (grew {grown}), "
+            f"~{saved:.1f}s less per fit at this size"
+        )
+    else:
+        n_trees = args.max_trees
+        model = make_model(n_estimators=n_trees)
+        with profiler.stage("fit"):
+            model.fit(x_train, y_train)
+
+    with profiler.stage("predict"):
+        y_pred = model.predict(x_val)
+    with profiler.stage("score"):
+        score = f1_score(y_val, y_pred, average="macro")
     print(f"Validation Macro F1 ({args.dataset}): {score:.4f}")
 
-    x_test = test.merge(feats, on="graph_id", how="left")[feature_cols]
-    test_preds = model.predict(x_test)
+    if args.refit_full:
+        model = make_model(n_estimators=n_trees)
+        with profiler.stage("fit"):
+            if sparse_labels:
+                x_full = sp.vstack([x_train, x_val], format="csr")
+            else:
+                x_full = pd.concat([x_train, x_val], ignore_index=True)
+            model.fit(x_full, pd.concat([y_train, y_val], ignore_index=True))
+        print(f"Refit on train+val with {n_trees} trees")
+
+    with profiler.stage("predict"):
+        test_preds = model.predict(x_test)
+    _write_predictions(test, test_preds, args.out or SUBMISSIONS_DIR / f"sample_submission_{args.dataset}.csv", profiler)
+
+    with profiler.stage("write"):
+        artifact_dir.mkdir(parents=True, exist_ok=True)
+        # Uncompressed so predict can memory-map the tree arrays.
+        joblib.dump(model, artifact_dir / "model.joblib")
+        meta = {
+            "dataset": str(args.dataset),
+            "data_hash": data_fingerprint(data_dir),
+            "features_code": features_code_hash(),
+            "feature_cols": feature_cols,
+            "sparse_labels": bool(sparse_labels),
+            "label_hash_width": args.label_hash_width,
+            "label_vocab": vocab.tolist() if vocab is not None else None,
+            "n_trees": int(n_trees),
+            "motifs": bool(args.motifs),
+            "refit_full": bool(args.refit_full),
+            "val_macro_f1": round(float(score), 8),
+            "sklearn_version": sklearn.__version__,
+        }
+        (artifact_dir / "model.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    print(f"Saved model artifact: {artifact_dir / 'model.joblib'}")
+    return 0
+
+
+def predict(args: argparse.Namespace, profiler: Profiler) -> int:
+    data_dir = CHALLENGE_ROOT / "data" / str(args.dataset)
+    artifact_dir = CHALLENGE_ROOT / "artifacts" / str(args.dataset)
+    meta_path = artifact_dir / "model.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"No model artifact for dataset={args.dataset} ({meta_path}); run `baseline.py train` first.")
+
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if meta["sklearn_version"] != sklearn.__version__:
+        print(f"Warning: artifact was saved with scikit-learn {meta['sklearn_version']}, running {sklearn.__version__}")
+    if meta["data_hash"] != data_fingerprint(data_dir):
+        print("Note: data changed since training; reusing the fitted model on the current data.")
+    if meta["features_code"] != features_code_hash():
+        print("Warning: feature code changed since training; retrain if the feature columns differ.")
 
-    out_path = submissions_dir / f"sample_submission_{args.dataset}.csv"
-    pd.DataFrame({"graph_id": test["graph_id"].to_numpy(), "target": test_preds}).to_csv(
-        out_path, index=False
+    with profiler.stage("load"):
+        model = joblib.load(artifact_dir / "model.joblib", mmap_mode="r")
+        test = read_split(data_dir / "test.csv")
+    nodes, feats, _ = load_features(
+        data_dir, artifact_dir, meta["sparse_labels"], meta.get("motifs", False), profiler
     )
-    print(f"Wrote: {out_path}")
+
+    vocab = np.asarray(meta["label_vocab"]) if meta["label_vocab"] is not None else None
+    with profiler.stage("features"):
+        x_test = design_matrix(test, feats, meta["feature_cols"], nodes, meta["label_hash_width"], vocab)
+    with profiler.stage("predict"):
+        test_preds = model.predict(x_test)
+    _write_predictions(test, test_preds, args.out or SUBMISSIONS_DIR / f"sample_submission_{args.dataset}.csv", profiler)
     return 0
 
 
+def main(argv: list[str] | None = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dataset", choices=dataset_names(), default=dataset_names()[0])
+    common.add_argument(
+        "--out", type=Path, default=None, help="Predictions CSV. Default: submissions/sample_submission_<dataset>.csv"
+    )
+    add_profile_args(common)
+
+    parser = argparse.ArgumentParser(description="Baseline for the Open GNN Mini-Competition (graph classification).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = commands.add_parser(
+        "train", parents=[common], help="Fit the model, write test predictions and save the model artifact (default)."
+    )
+    train_parser.add_argument(
+        "--early-stopping",
+        action="store_true",
+        help="Grow the forest incrementally (warm_start) and stop once validation Macro F1 plateaus.",
+    )
+    train_parser.add_argument("--max-trees", type=int, default=400, help="Forest size (upper bound with --early-stopping).")
+    train_parser.add_argument("--trees-step", type=int, default=25, help="Trees added per increment with --early-stopping.")
+    train_parser.add_argument("--tol", type=float, default=1e-3, help="Minimum val Macro F1 gain that counts as improvement.")
+    train_parser.add_argument("--patience", type=int, default=2, help="Increments without improvement before stopping.")
+    train_parser.add_argument(
+        "--sparse-labels",
+        action="store_true",
+        help="Emit node-label counts as a scipy.sparse CSR block (for datasets with many node labels).",
+    )
+    train_parser.add_argument(
+        "--label-hash-width",
+        type=int,
+        default=None,
+        help="Hash node labels into this many sparse count columns (implies --sparse-labels).",
+    )
+    train_parser.add_argument(
+        "--motifs",
+        action="store_true",
+        help="Add small-motif counts (wedges, triangles, 3-stars, 4-cycles, 4-cliques) to the features.",
+    )
+    train_parser.add_argument(
+        "--refit-full",
+        action="store_true",
+        help="Refit on train+val with the selected number of trees before predicting test.",
+    )
+    commands.add_parser(
+        "predict", parents=[common], help="Write test predictions from the saved model artifact without refitting."
+    )
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # `baseline.py --dataset X` (no subcommand) keeps meaning `train`.
+    if not argv or argv[0] not in {"train", "predict", "-h", "--help"}:
+        argv = ["train", *argv]
+    args = parser.parse_args(argv)
+    profiler = Profiler.from_args(args, command=f"baseline {args.command}")
+
+    result = train(args, profiler) if args.command == "train" else predict(args, profiler)
+    profiler.finish()
+    return result
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from graph_baseline_utils import count_motifs, graph_csr
+from make_synthetic import SyntheticConfig, generate_tu_arrays
+
+
+def synthetic_tables(cfg: SyntheticConfig) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Node and edge tables (local node ids) for a synthetic dataset, skipping the CSV round trip."""
+
+    arrays = generate_tu_arrays(cfg)
+    graph = arrays["graph_indicator"]
+    offsets = np.searchsorted(graph, np.arange(1, cfg.n_graphs + 1))
+    local = np.arange(graph.shape[0]) - offsets[graph - 1]
+    src, dst = arrays["A"][:, 0] - 1, arrays["A"][:, 1] - 1
+    nodes = pd.DataFrame({"graph_id": graph, "node_id": local})
+    edges = pd.DataFrame({"graph_id": graph[src], "src": local[src], "dst": local[dst]})
+    return nodes, edges
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Time count_motifs on synthetic datasets of growing size; cost should grow with the edge count."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000],
+        help="Graph counts to sweep. 10^5 graphs needs about 3.5 GB of RAM.",
+    )
+    parser.add_argument("--avg-degree", type=float, nargs="+", default=[SyntheticConfig.avg_degree])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None, help="Write all rows as JSON to this path.")
+    args = parser.parse_args()
+
+    rows: list[dict] = []
+    for avg_degree in args.avg_degree:
+        for n_graphs in args.sizes:
+            nodes, edges = synthetic_tables(SyntheticConfig(n_graphs=n_graphs, avg_degree=avg_degree, seed=args.seed))
+
+            start = time.perf_counter()
+            csr = graph_csr(nodes, edges)
+            csr_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            motifs = count_motifs(csr)
+            motifs_s = time.perf_counter() - start
+
+            n_edges = int(csr.adjacency.nnz // 2)
+            rows.append(
+                {
+                    "graphs": n_graphs,
+                    "avg_degree": avg_degree,
+                    "nodes": int(csr.node_ptr[-1]),
+                    "edges": n_edges,
+                    "triangles": int(motifs["motif_triangles"].sum()),
+                    "csr_s": round(csr_s, 4),
+                    "motifs_s": round(motifs_s, 4),
+                    "us_per_edge": round(1e6 * motifs_s / max(n_edges, 1), 3),
+                }
+            )
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"Wrote: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import f1_score
+from sklearn.pipeline import Pipeline
+
+from graph_baseline_utils import build_graph_features, read_edges, read_nodes, read_split
+from make_synthetic import SyntheticConfig, generate_tu_arrays, write_tu_zip
+from prepare_data import SplitConfig, prepare_dataset
+from profiling import Profiler
+
+
+# (reported label, Profiler stage name); prepare_dataset records its own nested load/write stages.
+STAGES = [
+    ("generate", "generate"),
+    ("prepare", "prepare"),
+    ("prepare:load", "load"),
+    ("prepare:write", "write"),
+    ("features", "features"),
+    ("train", "train"),
+    ("score", "score"),
+]
+
+
+def run_one(n_graphs: int, workdir: Path, trees: int, seed: int, report_path: Path, trace_memory: bool) -> None:
+    """Pushes one synthetic dataset through prepare, features, train and score under a Profiler."""
+
+    profiler = Profiler("benchmark_scaling", output=str(report_path), top_n=5, trace_memory=trace_memory)
+    zip_path = workdir / "SYNTHETIC.zip"
+    data_dir = workdir / "data"
+
+    with profiler.stage("generate"):
+        write_tu_zip(generate_tu_arrays(SyntheticConfig(n_graphs=n_graphs, seed=seed)), zip_path, "SYNTHETIC")
+
+    with profiler.stage("prepare"):
+        prepare_dataset(zip_path, "SYNTHETIC", data_dir, SplitConfig(seed=seed), write_test_labels=True, profiler=profiler)
+
+    with profiler.stage("features"):
+        feats, feature_cols = build_graph_features(read_nodes(data_dir / "nodes.csv"), read_edges(data_dir / "edges.csv"))
+
+    train = read_split(data_dir / "train.csv").merge(feats, on="graph_id", how="left")
+    test = read_split(data_dir / "test_labels.csv").merge(feats, on="graph_id", how="left")
+    model = Pipeline(
+        steps=[
+            ("imputer", SimpleImputer(strategy="median")),
+            ("rf", RandomForestClassifier(n_estimators=trees, random_state=seed, n_jobs=-1)),
+        ]
+    )
+    with profiler.stage("train"):
+        model.fit(train[feature_cols], train["target"])
+
+    with profiler.stage("score"):
+        score = f1_score(test["target"], model.predict(test[feature_cols]), average="macro")
+    print(f"graphs={n_graphs} test Macro F1={score:.4f}", file=sys.stderr)
+    profiler.finish()
+
+
+def _summarize(n_graphs: int, report: dict) -> list[dict]:
+    by_name = {s["name"]: s for s in report["stages"]}
+    return [
+        {
+            "graphs": n_graphs,
+            "stage": label,
+            "wall_s": by_name[name]["wall_s"],
+            "cpu_s": by_name[name]["cpu_s"],
+            "traced_peak_mb": by_name[name]["traced_peak_mb"],
+            "rss_peak_mb": by_name[name]["rss_peak_mb"],
+        }
+        for label, name in STAGES
+        if name in by_name
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Sweep synthetic dataset sizes through prepare, features, train and score; record time and peak memory."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000],
+        help="Graph counts to sweep. 10^6 graphs needs several GB of RAM and tens of minutes.",
+    )
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also record tracemalloc peaks per stage (several times slower; timings are then not representative).",
+    )
+    parser.add_argument("--out", type=Path, default=None, help="Write all rows as JSON to this path.")
+    parser.add_argument("--run-one", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", type=Path, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--report", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one is not None:
+        run_one(args.run_one, args.workdir, args.trees, args.seed, args.report, bool(args.trace_memory))
+        return 0
+
+    # Each size runs in a fresh interpreter so peak RSS is not inherited from smaller runs.
+    rows: list[dict] = []
+    for n_graphs in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="gnn-bench-") as tmp:
+            report_path = Path(tmp) / "profile.json"
+            cmd = [
+                sys.executable,
+                str(Path(__file__).resolve()),
+                "--run-one", str(n_graphs),
+                "--workdir", tmp,
+                "--report", str(report_path),
+                "--trees", str(args.trees),
+                "--seed", str(args.seed),
+            ] + (["--trace-memory"] if args.trace_memory else [])  # fmt: skip
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            rows.extend(_summarize(n_graphs, json.loads(report_path.read_text(encoding="utf-8"))))
+
+    table = pd.DataFrame(rows)
+    print(table.to_string(index=False))
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"Wrote: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
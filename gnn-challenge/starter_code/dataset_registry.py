@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "competition" / "config.yaml"
+
+# TU Dortmund / Graph Kernel Datasets (commonly used mirror)
+DEFAULT_URL_TEMPLATE = "https://www.chrsmrrs.com/graphkerneldatasets/{tu_name}.zip"
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    name: str
+    tu_name: str
+    url: str
+
+
+@lru_cache(maxsize=None)
+def load_registry(config_path: Path = CONFIG_PATH) -> dict[str, DatasetSpec]:
+    """Reads the competition datasets from config.yaml, in declaration order.
+
+    Entries may be plain names (``- proteins``) or mappings with ``name`` and optional
+    ``tu_name`` (default: upper-cased name) and ``url``.
+    """
+
+    config = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+    registry: dict[str, DatasetSpec] = {}
+    for entry in config.get("datasets") or []:
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        name = str(entry["name"]).strip()
+        if not name:
+            raise ValueError(f"Dataset entry without a name in {config_path}")
+        if name in registry:
+            raise ValueError(f"Duplicate dataset '{name}' in {config_path}")
+        tu_name = str(entry.get("tu_name") or name.upper())
+        url = str(entry.get("url") or DEFAULT_URL_TEMPLATE.format(tu_name=tu_name))
+        registry[name] = DatasetSpec(name=name, tu_name=tu_name, url=url)
+    if not registry:
+        raise ValueError(f"No datasets configured in {config_path}")
+    return registry
+
+
+def dataset_names() -> list[str]:
+    return list(load_registry())
+
+
+def get_dataset(name: str) -> DatasetSpec:
+    registry = load_registry()
+    if name not in registry:
+        raise ValueError(f"dataset must be one of: {', '.join(registry)}")
+    return registry[name]
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dataset_registry import dataset_names
+from graph_baseline_utils import (
+    build_graph_features,
+    data_fingerprint,
+    features_code_hash,
+    read_edges,
+    read_nodes,
+    read_split,
+)
+from profiling import Profiler, add_profile_args
+
+
+# Base learners, addressed as "<model>:<feature_set>" on the command line.
+MODELS: dict[str, dict] = {
+    "rf": {"n_estimators": 400, "random_state": 42},
+    "et": {"n_estimators": 400, "random_state": 42},
+    "hgb": {"max_iter": 200, "learning_rate": 0.05, "random_state": 42},
+    "lr": {"C": 1.0, "max_iter": 2000},
+}
+
+# Feature subsets of build_graph_features output, selected by column prefix.
+FEATURE_SETS: dict[str, tuple[str, ...]] = {
+    "all": ("",),
+    "structure": ("num_", "deg_", "edge_density"),
+    "labels": ("num_nodes", "node_label_count_"),
+    "attrs": ("num_nodes", "attr_"),
+}
+
+
+def _make_model(name: str) -> Pipeline:
+    params = MODELS[name]
+    steps: list[tuple[str, object]] = [("imputer", SimpleImputer(strategy="median"))]
+    if name == "rf":
+        steps.append(("clf", RandomForestClassifier(n_jobs=-1, **params)))
+    elif name == "et":
+        steps.append(("clf", ExtraTreesClassifier(n_jobs=-1, **params)))
+    elif name == "hgb":
+        steps.append(("clf", HistGradientBoostingClassifier(**params)))
+    else:
+        steps.extend([("scaler", StandardScaler()), ("clf", LogisticRegression(**params))])
+    return Pipeline(steps=steps)
+
+
+def _select_columns(feature_cols: list[str], feature_set: str) -> list[str]:
+    prefixes = FEATURE_SETS[feature_set]
+    cols = [c for c in feature_cols if c.startswith(prefixes)]
+    if not cols:
+        raise ValueError(f"Feature set '{feature_set}' selects no columns for this dataset")
+    return cols
+
+
+def cache_key(spec: str, folds: int, seed: int, data_hash: str) -> str:
+    model, feature_set = spec.split(":")
+    config = {
+        "model": model,
+        "params": MODELS[model],
+        "features": FEATURE_SETS[feature_set],
+        "folds": folds,
+        "seed": seed,
+        "data": data_hash,
+        # Feature engineering changes invalidate cached predictions just like data changes do.
+        "features_code": features_code_hash(),
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def cache_path(cache_dir: Path, spec: str, folds: int, seed: int, data_hash: str) -> Path:
+    return cache_dir / f"{spec.replace(':', '__')}-{cache_key(spec, folds, seed, data_hash)}.npz"
+
+
+def base_predictions(
+    spec: str,
+    frames: dict[str, pd.DataFrame],
+    feature_cols: list[str],
+    folds: int,
+    seed: int,
+    cache_dir: Path,
+    data_hash: str,
+) -> dict[str, np.ndarray]:
+    """Out-of-fold train, val and test class probabilities for one base model, cached on disk."""
+
+    path = cache_path(cache_dir, spec, folds, seed, data_hash)
+    if path.exists():
+        with np.load(path) as cached:
+            return {k: cached[k] for k in cached.files}
+
+    model_name, feature_set = spec.split(":")
+    cols = _select_columns(feature_cols, feature_set)
+    x_train = frames["train"][cols]
+    y_train = frames["train"]["target"].to_numpy()
+
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    oof = cross_val_predict(_make_model(model_name), x_train, y_train, cv=cv, method="predict_proba")
+
+    model = _make_model(model_name).fit(x_train, y_train)
+    out = {
+        "classes": model.classes_,
+        "oof": oof,
+        "val": model.predict_proba(frames["val"][cols]),
+        "test": model.predict_proba(frames["test"][cols]),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **out)
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Ensemble base models over cached out-of-fold predictions (base models are trained once per config)."
+    )
+    parser.add_argument("--dataset", choices=dataset_names(), default=dataset_names()[0])
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=["rf:all", "et:all", "hgb:all", "lr:structure"],
+        help=f"Base models as <model>:<feature_set>; models={sorted(MODELS)}, feature sets={sorted(FEATURE_SETS)}",
+    )
+    parser.add_argument("--meta", choices=["vote", "stack"], default="stack", help="Weighted soft vote or logistic-regression stacker")
+    parser.add_argument("--weights", nargs="+", type=float, default=None, help="Vote weights, one per base model (default: uniform)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=None, help="Default: submissions/ensemble_submission_<dataset>.csv")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args, command="ensemble")
+
+    for spec in args.models:
+        model_name, _, feature_set = spec.partition(":")
+        if model_name not in MODELS or feature_set not in FEATURE_SETS:
+            parser.error(f"invalid base model spec: {spec}")
+    if args.weights is not None and len(args.weights) != len(args.models):
+        parser.error("--weights needs one value per --models entry")
+
+    here = Path(__file__).resolve()
+    data_dir = here.parents[1] / "data" / str(args.dataset)
+    cache_dir = here.parents[1] / "artifacts" / str(args.dataset) / "oof"
+    out_path = args.out or here.parents[1] / "submissions" / f"ensemble_submission_{args.dataset}.csv"
+
+    with profiler.stage("load"):
+        # A raw byte hash; the node/edge tables themselves are only parsed on a cache miss.
+        data_hash = data_fingerprint(data_dir)
+        splits = {name: read_split(data_dir / f"{name}.csv") for name in ("train", "val", "test")}
+
+    # Graph tables and features are only needed when a base model is not cached yet; build lazily.
+    frames: dict[str, pd.DataFrame] = {}
+    feature_cols: list[str] = []
+
+    base: list[dict[str, np.ndarray]] = []
+    for spec in args.models:
+        if not frames and not cache_path(cache_dir, spec, args.folds, args.seed, data_hash).exists():
+            with profiler.stage("load"):
+                nodes = read_nodes(data_dir / "nodes.csv")
+                edges = read_edges(data_dir / "edges.csv")
+            with profiler.stage("features"):
+                feats, feature_cols = build_graph_features(nodes, edges)
+                frames = {name: df.merge(feats, on="graph_id", how="left") for name, df in splits.items()}
+        with profiler.stage("fit"):
+            base.append(base_predictions(spec, frames, feature_cols, args.folds, args.seed, cache_dir, data_hash))
+
+    classes = base[0]["classes"]
+    y_train = splits["train"]["target"].to_numpy()
+    y_val = splits["val"]["target"].to_numpy()
+    for spec, preds in zip(args.models, base):
+        score = f1_score(y_val, classes[preds["val"].argmax(axis=1)], average="macro")
+        print(f"  base {spec:<16} val Macro F1: {score:.4f}")
+
+    with profiler.stage("predict"):
+        if args.meta == "vote":
+            weights = np.asarray(args.weights or [1.0] * len(base), dtype=float)
+            weights = weights / weights.sum()
+            val_proba = sum(w * p["val"] for w, p in zip(weights, base))
+            test_proba = sum(w * p["test"] for w, p in zip(weights, base))
+        else:
+            stacker = LogisticRegression(max_iter=2000)
+            stacker.fit(np.hstack([p["oof"] for p in base]), y_train)
+            val_proba = stacker.predict_proba(np.hstack([p["val"] for p in base]))
+            test_proba = stacker.predict_proba(np.hstack([p["test"] for p in base]))
+        val_pred = classes[val_proba.argmax(axis=1)]
+        test_pred = classes[test_proba.argmax(axis=1)]
+
+    score = f1_score(y_val, val_pred, average="macro")
+    print(f"Validation Macro F1 ({args.dataset}, {args.meta} of {len(base)}): {score:.4f}")
+
+    with profiler.stage("write"):
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({"graph_id": splits["test"]["graph_id"].to_numpy(), "target": test_pred}).to_csv(
+            out_path, index=False
+        )
+    print(f"Wrote: {out_path}")
+    profiler.finish()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,47 +1,338 @@
 from __future__ import annotations
 
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from sklearn.utils import murmurhash3_32
+
+
+# Compact on-disk/in-memory schema for the prepared tables. Ids fit int32 for any TU
+# dataset, node labels fit int16 and class ids fit uint8; node attributes (attr_*) are float32.
+# Integer columns are widened (see fit_int_dtype) rather than wrapped when values do not fit.
+NODE_DTYPES: dict[str, str] = {"graph_id": "int32", "node_id": "int32", "node_label": "int16"}
+EDGE_DTYPES: dict[str, str] = {"graph_id": "int32", "src": "int32", "dst": "int32"}
+SPLIT_DTYPES: dict[str, str] = {"graph_id": "int32", "target": "uint8"}
+ATTR_DTYPE = "float32"
+
+
+def table_dtypes(columns: list[str], base: dict[str, str]) -> dict[str, str]:
+    """Returns the explicit read_csv dtype mapping for the given header."""
+
+    dtypes = {c: base[c] for c in columns if c in base}
+    dtypes.update({c: ATTR_DTYPE for c in columns if c.startswith("attr_")})
+    return dtypes
+
+
+def fit_int_dtype(values: np.ndarray, preferred: str) -> str:
+    """preferred if every value fits it, else the narrowest of int32/int64 that does."""
+
+    for dtype in (preferred, "int32", "int64"):
+        bound = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= bound.min and values.max() <= bound.max):
+            return dtype
+    raise ValueError(f"Integer values out of int64 range (min={values.min()}, max={values.max()})")
+
+
+def read_table(path: Path, base: dict[str, str]) -> pd.DataFrame:
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    dtypes = table_dtypes(header, base)
+    # read_csv wraps integers that overflow the requested dtype, so parse as int64 and narrow after a range check.
+    ints = [c for c in dtypes if c in base]
+    df = pd.read_csv(path, dtype={**dtypes, **{c: "int64" for c in ints}})
+    for c in ints:
+        df[c] = df[c].astype(fit_int_dtype(df[c].to_numpy(), base[c]))
+    return df
+
+
+def read_nodes(path: Path) -> pd.DataFrame:
+    return read_table(path, NODE_DTYPES)
+
+
+def read_edges(path: Path) -> pd.DataFrame:
+    return read_table(path, EDGE_DTYPES)
+
+
+def read_split(path: Path) -> pd.DataFrame:
+    return read_table(path, SPLIT_DTYPES)
+
+
+def data_fingerprint(data_dir: Path, names: tuple[str, ...] = ("nodes.csv", "edges.csv", "train.csv", "val.csv", "test.csv")) -> str:
+    """Content hash of a prepared dataset folder, used to key cached predictions and artifacts."""
+
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(name.encode("utf-8"))
+        with (data_dir / name).open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def features_code_hash() -> str:
+    """Hash of this module's source; feature caches keyed on it are invalidated by feature code changes."""
+
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def canonical_edges(edges: pd.DataFrame) -> pd.DataFrame:
+    """Each undirected edge once: src <= dst, duplicates dropped, sorted by (graph_id, src, dst).
+
+    TU lists every edge in both directions; this halves the table. Self-loops are kept as the
+    src == dst rows so they can be counted. Idempotent, so canonical tables pass through unchanged.
+    """
+
+    graph = edges["graph_id"].to_numpy()
+    src = edges["src"].to_numpy()
+    dst = edges["dst"].to_numpy()
+    lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+
+    order = np.lexsort((hi, lo, graph))
+    graph, lo, hi = graph[order], lo[order], hi[order]
+    keep = np.ones(graph.shape[0], dtype=bool)
+    keep[1:] = (graph[1:] != graph[:-1]) | (lo[1:] != lo[:-1]) | (hi[1:] != hi[:-1])
+    return pd.DataFrame(
+        {
+            "graph_id": graph[keep].astype(EDGE_DTYPES["graph_id"]),
+            "src": lo[keep].astype(EDGE_DTYPES["src"]),
+            "dst": hi[keep].astype(EDGE_DTYPES["dst"]),
+        }
+    )
+
+
+@dataclass(frozen=True)
+class GraphCSR:
+    """Symmetric block-diagonal adjacency of all graphs, over global node indices.
+
+    Graph graph_ids[k] owns global nodes node_ptr[k]:node_ptr[k + 1] in node_id order.
+    Self-loops are left out of the adjacency and counted in self_loops instead.
+    """
+
+    graph_ids: np.ndarray
+    node_ptr: np.ndarray
+    adjacency: sp.csr_matrix
+    self_loops: np.ndarray
+
+    @property
+    def num_nodes(self) -> np.ndarray:
+        return np.diff(self.node_ptr)
+
+    @property
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.adjacency.indptr)
+
+    @property
+    def node_graph(self) -> np.ndarray:
+        """Position in graph_ids of each global node."""
+
+        return np.repeat(np.arange(self.graph_ids.shape[0]), self.num_nodes)
+
+    def graph(self, k: int) -> sp.csr_matrix:
+        """Adjacency of the k-th graph with local (node_id order) indices."""
+
+        lo, hi = self.node_ptr[k], self.node_ptr[k + 1]
+        return self.adjacency[lo:hi, lo:hi]
+
 
+def graph_csr(nodes: pd.DataFrame, edges: pd.DataFrame) -> GraphCSR:
+    """Builds the GraphCSR view from the node table and a (canonical or raw) edge table.
 
-def build_graph_features(nodes: pd.DataFrame, edges: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    Edges pointing at nodes missing from the node table are ignored.
+    """
+
+    node_graph = nodes["graph_id"].to_numpy(dtype=np.int64)
+    node_id = nodes["node_id"].to_numpy(dtype=np.int64)
+    stride = int(node_id.max()) + 1 if node_id.size else 1
+    node_keys = np.sort(node_graph * stride + node_id)
+    graph_ids, counts = np.unique(node_keys // stride, return_counts=True)
+    node_ptr = np.concatenate([[0], np.cumsum(counts)])
+    n_total = int(node_keys.shape[0])
+
+    canon = canonical_edges(edges)
+    edge_graph = canon["graph_id"].to_numpy(dtype=np.int64)
+    endpoints = []
+    for col in ("src", "dst"):
+        local = canon[col].to_numpy(dtype=np.int64)
+        keys = edge_graph * stride + local
+        pos = np.minimum(np.searchsorted(node_keys, keys), max(n_total - 1, 0))
+        found = (local < stride) & (node_keys[pos] == keys) if n_total else np.zeros(keys.shape[0], dtype=bool)
+        endpoints.append((pos, found))
+    (u, u_ok), (v, v_ok) = endpoints
+    valid = u_ok & v_ok
+    loop = valid & (u == v)
+    pair = valid & ~loop
+
+    rows = np.concatenate([u[pair], v[pair]])
+    cols = np.concatenate([v[pair], u[pair]])
+    adjacency = sp.csr_matrix(
+        (np.ones(rows.shape[0], dtype=np.int32), (rows, cols)), shape=(n_total, n_total)
+    )
+    adjacency.sort_indices()
+    self_loops = np.bincount(
+        np.searchsorted(graph_ids, edge_graph[loop]), minlength=graph_ids.shape[0]
+    ).astype(np.int32)
+    return GraphCSR(graph_ids=graph_ids, node_ptr=node_ptr, adjacency=adjacency, self_loops=self_loops)
+
+
+def _choose2(x: np.ndarray) -> np.ndarray:
+    x = x.astype(np.int64)
+    return x * (x - 1) // 2
+
+
+def _oriented_edges(csr: GraphCSR) -> tuple[np.ndarray, np.ndarray]:
+    """Each edge once, pointing from lower to higher (degree, index) rank, sorted by source.
+
+    Bounds every node's out-degree by sqrt(2m), which keeps the K4 joins small.
+    """
+
+    coo = csr.adjacency.tocoo()
+    rank = np.lexsort((np.arange(csr.degrees.shape[0]), csr.degrees)).argsort()
+    forward = rank[coo.row] < rank[coo.col]
+    src, dst = coo.row[forward].astype(np.int64), coo.col[forward].astype(np.int64)
+    order = np.lexsort((dst, src))
+    return src[order], dst[order]
+
+
+def _out_pairs(src: np.ndarray, dst: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """All (u, v, w) with u->v and u->w oriented edges, v listed before w (a self-join on u)."""
+
+    n_edges = src.shape[0]
+    ends = np.searchsorted(src, src, side="right")
+    later = ends - np.arange(n_edges) - 1  # out-edges of u after this one
+    first = np.repeat(np.arange(n_edges), later)
+    offset = np.arange(first.shape[0]) - np.repeat(np.cumsum(later) - later, later)
+    second = first + 1 + offset
+    return src[first], dst[first], dst[second]
+
+
+def _has_edge(keys: np.ndarray, n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Whether the undirected edge (a, b) exists; keys are sorted min*n+max edge keys."""
+
+    query = np.minimum(a, b) * n + np.maximum(a, b)
+    pos = np.minimum(np.searchsorted(keys, query), max(keys.shape[0] - 1, 0))
+    return keys[pos] == query if keys.shape[0] else np.zeros(query.shape[0], dtype=bool)
+
+
+def count_motifs(csr: GraphCSR, block_paths: int = 1 << 24) -> pd.DataFrame:
+    """Small-motif counts (not necessarily induced) for every graph at once.
+
+    Wedges and 3-stars come from degree combinatorics, triangles and 4-cycles from the
+    sparse product A @ A over the block-diagonal adjacency, and 4-cliques from relational
+    joins on the degree-oriented edge list. One row per graph, in csr.graph_ids order.
+    A @ A is formed over runs of whole graphs holding about block_paths 2-paths each,
+    which bounds peak memory on large datasets.
+    """
+
+    n_graphs = csr.graph_ids.shape[0]
+    node_graph = csr.node_graph
+    degrees = csr.degrees
+    adjacency = csr.adjacency
+
+    def per_graph(values: np.ndarray, graph_index: np.ndarray = node_graph) -> np.ndarray:
+        return np.bincount(graph_index, weights=values, minlength=n_graphs)
+
+    wedges = per_graph(_choose2(degrees))
+    stars = per_graph(degrees.astype(np.int64) * (degrees - 1) * (degrees - 2) // 6)
+
+    # (A @ A)[i, j] counts common neighbours; on edges it closes triangles, off-diagonal
+    # pairs with c common neighbours span C(c, 2) 4-cycles (each cycle has two such diagonals).
+    n_total = degrees.shape[0]
+    on_edge = np.zeros(n_total)
+    cycles4 = np.zeros(n_graphs)
+    graph_paths = np.cumsum(per_graph(degrees.astype(np.float64) ** 2))
+    total_paths = graph_paths[-1] if n_graphs else 0.0
+    cuts = np.searchsorted(graph_paths, np.arange(block_paths, total_paths, block_paths), side="right")
+    bounds = np.unique(np.concatenate([[0], cuts, [n_graphs]]))
+    for g0, g1 in zip(bounds[:-1], bounds[1:]):
+        lo, hi = csr.node_ptr[g0], csr.node_ptr[g1]
+        block = adjacency[lo:hi, lo:hi]
+        paths2 = (block @ block).tocoo()
+        on_edge[lo:hi] = np.asarray(paths2.multiply(block).sum(axis=1)).ravel()
+        off_diag = paths2.row != paths2.col
+        cycles4 += per_graph(_choose2(paths2.data[off_diag]), node_graph[lo + paths2.row[off_diag]])
+    triangles = per_graph(on_edge) / 6.0
+    cycles4 /= 4.0
+
+    # 4-cliques: every clique has a unique lowest-rank node u whose out-neighbours v < w < x
+    # are pairwise adjacent. Join closed pairs (u, v, w) with closed pairs (u, w, x), then check v-x.
+    src, dst = _oriented_edges(csr)
+    keys = np.sort(np.minimum(src, dst) * n_total + np.maximum(src, dst))
+    u, v, w = _out_pairs(src, dst)
+    closed = _has_edge(keys, n_total, v, w)
+    tri = pd.DataFrame({"u": u[closed], "v": v[closed], "w": w[closed]})
+    joined = tri.merge(tri.rename(columns={"v": "w", "w": "x"}), on=["u", "w"])
+    has_vx = _has_edge(keys, n_total, joined["v"].to_numpy(), joined["x"].to_numpy())
+    cliques4 = per_graph(has_vx.astype(float), node_graph[joined["u"].to_numpy()])
+
+    out = pd.DataFrame({"graph_id": csr.graph_ids.astype(NODE_DTYPES["graph_id"])})
+    out["motif_wedges"] = np.rint(wedges).astype(np.int64)
+    out["motif_open_wedges"] = np.rint(wedges - 3.0 * triangles).astype(np.int64)
+    out["motif_triangles"] = np.rint(triangles).astype(np.int64)
+    out["motif_stars3"] = np.rint(stars).astype(np.int64)
+    out["motif_cycles4"] = np.rint(cycles4).astype(np.int64)
+    out["motif_cliques4"] = np.rint(cliques4).astype(np.int64)
+    out["motif_transitivity"] = np.divide(3.0 * triangles, wedges, out=np.zeros(n_graphs), where=wedges > 0)
+    return out
+
+
+def memory_report(name: str, df: pd.DataFrame) -> str:
+    """One-line summary of a table's memory versus pandas' int64/float64 defaults."""
+
+    used = int(df.memory_usage(index=True, deep=True).sum())
+    default = int(df.index.memory_usage()) + sum(
+        len(df) * 8 if pd.api.types.is_numeric_dtype(df[c]) else int(df[c].memory_usage(index=False, deep=True))
+        for c in df.columns
+    )
+    saved = 1.0 - used / default if default else 0.0
+    mib = 1024 * 1024
+    return f"{name}: {used / mib:.2f} MiB ({default / mib:.2f} MiB with default dtypes, {saved:.0%} saved)"
+
+
+def build_graph_features(
+    nodes: pd.DataFrame, edges: pd.DataFrame, label_counts: bool = True, motifs: bool = False
+) -> tuple[pd.DataFrame, list[str]]:
     """Builds simple graph-level features from per-node and per-edge tables.
 
     Returns (features_df, feature_columns), where features_df has a 'graph_id' column.
+    Pass label_counts=False to leave out the dense node-label histogram (see build_label_count_matrix),
+    and motifs=True to add the motif_* counts from count_motifs.
     """
 
-    # Basic sizes
-    node_counts = nodes.groupby("graph_id").size().rename("num_nodes")
-    edge_counts = edges.groupby("graph_id").size().rename("num_edges")
+    # Structure from the undirected view: each edge once, isolated nodes have degree 0.
+    csr = graph_csr(nodes, edges)
+    node_graph = csr.node_graph
+    n_graphs = csr.graph_ids.shape[0]
+    degrees = csr.degrees
 
-    feats = pd.concat([node_counts, edge_counts], axis=1).fillna(0.0).reset_index()
-    feats["num_nodes"] = feats["num_nodes"].astype(int)
-    feats["num_edges"] = feats["num_edges"].astype(int)
+    feats = pd.DataFrame({"graph_id": csr.graph_ids.astype(NODE_DTYPES["graph_id"])})
+    feats["num_nodes"] = csr.num_nodes.astype("int32")
+    feats["num_edges"] = (np.bincount(node_graph, weights=degrees, minlength=n_graphs) // 2).astype("int32")
+    feats["num_self_loops"] = csr.self_loops
 
-    # Degree-based summaries (treat edges as directed in file; counts still informative)
-    if not edges.empty:
-        deg = edges.groupby(["graph_id", "src"]).size().rename("out_deg").reset_index()
-        deg_stats = deg.groupby("graph_id")["out_deg"].agg(["mean", "std", "max"]).fillna(0.0)
-        deg_stats.columns = ["outdeg_mean", "outdeg_std", "outdeg_max"]
-        feats = feats.merge(deg_stats.reset_index(), on="graph_id", how="left")
-    else:
-        feats["outdeg_mean"] = 0.0
-        feats["outdeg_std"] = 0.0
-        feats["outdeg_max"] = 0.0
+    deg_stats = pd.Series(degrees).groupby(node_graph).agg(["mean", "std", "max"]).fillna(0.0)
+    feats["deg_mean"] = deg_stats["mean"].to_numpy()
+    feats["deg_std"] = deg_stats["std"].to_numpy()
+    feats["deg_max"] = deg_stats["max"].to_numpy(dtype=float)
 
-    # Density (undirected-ish proxy; safe when num_nodes < 2)
+    # Exact undirected density 2m / (n(n-1)); safe when num_nodes < 2
     n = feats["num_nodes"].to_numpy(dtype=float)
     m = feats["num_edges"].to_numpy(dtype=float)
     denom = np.maximum(n * (n - 1.0), 1.0)
-    feats["edge_density"] = (m / denom).astype(float)
+    feats["edge_density"] = (2.0 * m / denom).astype(float)
+
+    if motifs:
+        feats = feats.merge(count_motifs(csr), on="graph_id", how="left")
 
     # Node label histogram if present
-    if "node_label" in nodes.columns:
+    if label_counts and "node_label" in nodes.columns:
         # Reindex labels to 0..K-1 stable for compact columns
         labels = nodes[["graph_id", "node_label"]].copy()
         uniq = sorted(labels["node_label"].dropna().unique().tolist())
         mapping = {lab: i for i, lab in enumerate(uniq)}
-        labels["node_label_idx"] = labels["node_label"].map(mapping).astype(int)
+        labels["node_label_idx"] = labels["node_label"].map(mapping).astype("int32")
 
         counts = (
             labels.groupby(["graph_id", "node_label_idx"]).size().unstack(fill_value=0).sort_index(axis=1)
@@ -58,3 +349,42 @@ def build_graph_features(nodes: pd.DataFrame, edges: pd.DataFrame) -> tuple[pd.D
 
     feature_cols = [c for c in feats.columns if c != "graph_id"]
     return feats, feature_cols
+
+
+def build_label_count_matrix(
+    nodes: pd.DataFrame,
+    graph_ids: np.ndarray,
+    hash_width: int | None = None,
+    vocab: np.ndarray | None = None,
+) -> tuple[sp.csr_matrix, list[str]]:
+    """Node-label histograms as a CSR matrix with one row per entry of graph_ids.
+
+    Columns are the distinct node labels of the whole table (so train/val/test matrices line
+    up), or hash_width murmurhash buckets when hash_width is set. Pass a saved vocab (sorted
+    labels) to reproduce training-time columns; labels outside it are dropped. Graphs without
+    nodes get an empty row.
+    """
+
+    graph_ids = np.asarray(graph_ids)
+    labels = nodes["node_label"].to_numpy()
+    if hash_width:
+        cols = murmurhash3_32(labels.astype(np.int32), seed=0, positive=True) % int(hash_width)
+        known = np.ones(labels.shape[0], dtype=bool)
+        width = int(hash_width)
+        names = [f"node_label_hash_{i}" for i in range(width)]
+    else:
+        vocab = np.unique(labels) if vocab is None else np.asarray(vocab)
+        cols = np.searchsorted(vocab, labels)
+        known = cols < vocab.shape[0]
+        known[known] = vocab[cols[known]] == labels[known]
+        width = int(vocab.shape[0])
+        names = [f"node_label_count_{i}" for i in range(width)]
+
+    rows = pd.Index(graph_ids).get_indexer(nodes["graph_id"].to_numpy())
+    keep = (rows >= 0) & known
+    # Duplicate (row, col) pairs are summed on conversion, which is exactly the histogram.
+    counts = sp.coo_matrix(
+        (np.ones(int(keep.sum()), dtype=np.float32), (rows[keep], cols[keep])),
+        shape=(graph_ids.shape[0], width),
+    ).tocsr()
+    return counts, names
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import argparse
+import io
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prepare_data import SplitConfig, prepare_dataset
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    n_graphs: int = 1000
+    mean_nodes: float = 39.0  # PROTEINS-like sizes
+    size_dist: str = "lognormal"  # or "poisson"
+    min_nodes: int = 2
+    avg_degree: float = 3.7
+    n_node_labels: int = 3  # 0 disables <prefix>_node_labels.txt
+    attr_dim: int = 1  # 0 disables <prefix>_node_attributes.txt
+    class_weights: tuple[float, ...] = (0.6, 0.4)
+    seed: int = 0
+
+
+def generate_tu_arrays(cfg: SyntheticConfig) -> dict[str, np.ndarray]:
+    """Random graphs in TU layout (1-based global node ids), generated for all graphs at once.
+
+    Classes shift graph size, edge density, node-label mix and attribute means slightly,
+    so the task is learnable but not trivial.
+    """
+
+    rng = np.random.default_rng(cfg.seed)
+    weights = np.asarray(cfg.class_weights, dtype=float)
+    y = rng.choice(weights.shape[0], size=cfg.n_graphs, p=weights / weights.sum())
+
+    mean_nodes = cfg.mean_nodes * (1.0 + 0.1 * y)
+    if cfg.size_dist == "poisson":
+        sizes = rng.poisson(mean_nodes)
+    elif cfg.size_dist == "lognormal":
+        sigma = 0.5
+        sizes = np.rint(rng.lognormal(np.log(mean_nodes) - sigma**2 / 2.0, sigma))
+    else:
+        raise ValueError(f"Unknown size distribution: {cfg.size_dist}")
+    sizes = np.maximum(sizes.astype(np.int64), cfg.min_nodes)
+
+    n_nodes = int(sizes.sum())
+    offsets = np.cumsum(sizes) - sizes
+    node_class = np.repeat(y, sizes)
+
+    # Sample endpoints uniformly inside each graph, then keep unique undirected non-loop pairs.
+    n_edges = rng.poisson(sizes * cfg.avg_degree * (1.0 + 0.15 * y) / 2.0)
+    edge_graph = np.repeat(np.arange(cfg.n_graphs), n_edges)
+    u = offsets[edge_graph] + (rng.random(edge_graph.shape[0]) * sizes[edge_graph]).astype(np.int64)
+    v = offsets[edge_graph] + (rng.random(edge_graph.shape[0]) * sizes[edge_graph]).astype(np.int64)
+    lo, hi = np.minimum(u, v), np.maximum(u, v)
+    keys = np.unique((lo * n_nodes + hi)[lo != hi])
+    lo, hi = keys // n_nodes, keys % n_nodes
+
+    # TU lists every undirected edge in both directions, sorted by source node.
+    src = np.concatenate([lo, hi])
+    dst = np.concatenate([hi, lo])
+    order = np.lexsort((dst, src))
+
+    arrays: dict[str, np.ndarray] = {
+        "graph_indicator": np.repeat(np.arange(1, cfg.n_graphs + 1), sizes),
+        "graph_labels": y + 1,
+        "A": np.column_stack([src[order], dst[order]]) + 1,
+    }
+    if cfg.n_node_labels > 0:
+        base = rng.integers(0, cfg.n_node_labels, size=n_nodes)
+        shift = rng.random(n_nodes) < 0.2 * node_class
+        arrays["node_labels"] = (base + shift) % cfg.n_node_labels
+    if cfg.attr_dim > 0:
+        attrs = rng.normal(loc=0.5 * node_class[:, None], scale=1.0, size=(n_nodes, cfg.attr_dim))
+        arrays["node_attributes"] = attrs.astype(np.float32)
+    return arrays
+
+
+def write_tu_zip(arrays: dict[str, np.ndarray], zip_path: Path, prefix: str) -> None:
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for key, values in arrays.items():
+            buf = io.StringIO()
+            pd.DataFrame(values.reshape(values.shape[0], -1)).to_csv(buf, header=False, index=False)
+            zf.writestr(f"{prefix}/{prefix}_{key}.txt", buf.getvalue())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic TU-format graph classification dataset.")
+    parser.add_argument("--name", default="synthetic", help="Dataset name; TU prefix is the upper-cased name.")
+    parser.add_argument("--graphs", type=int, default=SyntheticConfig.n_graphs)
+    parser.add_argument("--mean-nodes", type=float, default=SyntheticConfig.mean_nodes)
+    parser.add_argument("--size-dist", choices=["lognormal", "poisson"], default=SyntheticConfig.size_dist)
+    parser.add_argument("--min-nodes", type=int, default=SyntheticConfig.min_nodes)
+    parser.add_argument("--avg-degree", type=float, default=SyntheticConfig.avg_degree)
+    parser.add_argument("--node-labels", type=int, default=SyntheticConfig.n_node_labels, help="Number of distinct node labels (0: none)")
+    parser.add_argument("--attr-dim", type=int, default=SyntheticConfig.attr_dim, help="Node attribute dimension (0: none)")
+    parser.add_argument(
+        "--class-weights",
+        type=float,
+        nargs="+",
+        default=list(SyntheticConfig.class_weights),
+        help="Relative class frequencies; the number of values sets the number of classes.",
+    )
+    parser.add_argument("--seed", type=int, default=SyntheticConfig.seed)
+    parser.add_argument("--zip-out", type=Path, default=None, help="Default: gnn-challenge/raw/<PREFIX>.zip")
+    parser.add_argument("--out-dir", type=Path, default=None, help="Prepared CSV layout. Default: gnn-challenge/data/<name>")
+    parser.add_argument("--zip-only", action="store_true", help="Only write the TU zip, skip the prepared CSV layout.")
+    args = parser.parse_args()
+
+    cfg = SyntheticConfig(
+        n_graphs=int(args.graphs),
+        mean_nodes=float(args.mean_nodes),
+        size_dist=str(args.size_dist),
+        min_nodes=int(args.min_nodes),
+        avg_degree=float(args.avg_degree),
+        n_node_labels=int(args.node_labels),
+        attr_dim=int(args.attr_dim),
+        class_weights=tuple(args.class_weights),
+        seed=int(args.seed),
+    )
+
+    challenge_root = Path(__file__).resolve().parents[1]
+    prefix = str(args.name).upper()
+    zip_path = args.zip_out or challenge_root / "raw" / f"{prefix}.zip"
+
+    write_tu_zip(generate_tu_arrays(cfg), zip_path, prefix)
+    print(f"Wrote: {zip_path}")
+
+    if not args.zip_only:
+        out_dir = args.out_dir or challenge_root / "data" / str(args.name)
+        prepare_dataset(zip_path, prefix, out_dir, SplitConfig(seed=cfg.seed), write_test_labels=True)
+        print(f"Wrote prepared dataset to: {out_dir} (including test_labels.csv)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,6 +11,18 @@ import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from dataset_registry import dataset_names, get_dataset
+from graph_baseline_utils import (
+    ATTR_DTYPE,
+    EDGE_DTYPES,
+    NODE_DTYPES,
+    SPLIT_DTYPES,
+    canonical_edges,
+    fit_int_dtype,
+    memory_report,
+)
+from profiling import Profiler, add_profile_args
+
 
 @dataclass(frozen=True)
 class SplitConfig:
@@ -19,17 +31,21 @@ class SplitConfig:
     val_frac: float = 0.2  # fraction of remaining (after test)
 
 
-_DEFAULT_URLS: dict[str, str] = {
-    # TU Dortmund / Graph Kernel Datasets (commonly used mirror)
-    "mutag": "https://www.chrsmrrs.com/graphkerneldatasets/MUTAG.zip",
-    "proteins": "https://www.chrsmrrs.com/graphkerneldatasets/PROTEINS.zip",
-}
-
+def _read_array_from_zip(zf: zipfile.ZipFile, name: str, dtype: str) -> np.ndarray:
+    """Parses a comma-separated TU text file into a 2-D array with pandas' C parser."""
 
-def _read_txt_from_zip(zf: zipfile.ZipFile, name: str) -> list[str]:
     with zf.open(name) as f:
-        raw = f.read().decode("utf-8", errors="replace")
-    return [ln.strip() for ln in raw.splitlines() if ln.strip()]
+        table = pd.read_csv(
+            f,
+            header=None,
+            sep=",",
+            skipinitialspace=True,
+            encoding="utf-8",
+            encoding_errors="replace",
+        )
+    # Trailing commas yield empty columns; drop them like the TU readers do.
+    table = table.dropna(axis=1, how="all")
+    return table.to_numpy(dtype=dtype)
 
 
 def _find_member(zf: zipfile.ZipFile, wanted_suffix: str) -> str | None:
@@ -70,8 +86,8 @@ def _load_tu_dataset(zip_path: Path, prefix: str) -> tuple[pd.DataFrame, pd.Data
                 f"Zip {zip_path} is missing required TU files for prefix={prefix}: {missing}"
             )
 
-        graph_indicator = np.array([int(x) for x in _read_txt_from_zip(zf, gi_name)], dtype=int)
-        raw_graph_labels = np.array([int(x) for x in _read_txt_from_zip(zf, gl_name)], dtype=int)
+        graph_indicator = _read_array_from_zip(zf, gi_name, "int32")[:, 0]
+        raw_graph_labels = _read_array_from_zip(zf, gl_name, "int64")[:, 0]
 
         # Optional node labels / attributes
         nl_name = _find_member(zf, f"{prefix}_node_labels.txt")
@@ -81,22 +97,15 @@ def _load_tu_dataset(zip_path: Path, prefix: str) -> tuple[pd.DataFrame, pd.Data
         node_attrs: np.ndarray | None = None
 
         if nl_name:
-            node_labels = np.array([int(x) for x in _read_txt_from_zip(zf, nl_name)], dtype=int)
+            # Some TU datasets carry several label columns; the first is the node label.
+            node_labels = _read_array_from_zip(zf, nl_name, "int64")[:, 0]
 
         if na_name:
-            lines = _read_txt_from_zip(zf, na_name)
             # Comma-separated floats
-            attrs = [
-                [float(v) for v in ln.replace(" ", "").split(",") if v != ""]
-                for ln in lines
-            ]
-            node_attrs = np.asarray(attrs, dtype=float)
+            node_attrs = _read_array_from_zip(zf, na_name, ATTR_DTYPE)
 
         # Edges are global node ids (1-based)
-        edges_lines = _read_txt_from_zip(zf, a_name)
-        edges_global = np.array(
-            [[int(p) for p in ln.replace(" ", "").split(",")[:2]] for ln in edges_lines], dtype=int
-        )
+        edges_global = _read_array_from_zip(zf, a_name, "int64")[:, :2]
 
     n_nodes = graph_indicator.shape[0]
     n_graphs = raw_graph_labels.shape[0]
@@ -109,45 +118,51 @@ def _load_tu_dataset(zip_path: Path, prefix: str) -> tuple[pd.DataFrame, pd.Data
     # Map arbitrary labels to 0..C-1 (stable)
     unique = sorted(set(raw_graph_labels.tolist()))
     label_to_index = {lab: i for i, lab in enumerate(unique)}
-    targets = np.array([label_to_index[int(l)] for l in raw_graph_labels], dtype=int)
-
-    # Build per-graph node lists
-    graph_to_nodes: list[list[int]] = [[] for _ in range(n_graphs + 1)]  # 1..n_graphs
-    for global_node_id, g in enumerate(graph_indicator, start=1):
-        graph_to_nodes[g].append(global_node_id)
-
-    # Prepare nodes_df
-    node_rows: list[dict] = []
-    global_to_local: dict[int, tuple[int, int]] = {}  # global_id -> (graph_id, local_id)
-    for g in range(1, n_graphs + 1):
-        nodes = graph_to_nodes[g]
-        for local_id, global_id in enumerate(nodes):
-            global_to_local[global_id] = (g, local_id)
-            row: dict[str, object] = {"graph_id": g, "node_id": local_id}
-            if node_labels is not None:
-                row["node_label"] = int(node_labels[global_id - 1])
-            if node_attrs is not None:
-                for j, v in enumerate(node_attrs[global_id - 1]):
-                    row[f"attr_{j}"] = float(v)
-            node_rows.append(row)
-
-    nodes_df = pd.DataFrame(node_rows)
+    targets = np.searchsorted(np.asarray(unique), raw_graph_labels)
+    targets = targets.astype(fit_int_dtype(targets, SPLIT_DTYPES["target"]))
+
+    # Local node ids: position of each node among its graph's nodes, in global-id order.
+    in_range = (graph_indicator >= 1) & (graph_indicator <= n_graphs)
+    order = np.flatnonzero(in_range)
+    order = order[np.argsort(graph_indicator[order], kind="stable")]
+    sorted_graphs = graph_indicator[order]
+    local_sorted = np.arange(order.shape[0]) - np.searchsorted(sorted_graphs, sorted_graphs, side="left")
+    local_id = np.full(n_nodes, -1, dtype=np.int64)
+    local_id[order] = local_sorted
+
+    # Prepare nodes_df (one typed column per field, nodes grouped by graph)
+    node_cols: dict[str, np.ndarray] = {
+        "graph_id": sorted_graphs.astype(NODE_DTYPES["graph_id"]),
+        "node_id": local_sorted.astype(NODE_DTYPES["node_id"]),
+    }
+    if node_labels is not None:
+        node_cols["node_label"] = node_labels[order].astype(fit_int_dtype(node_labels, NODE_DTYPES["node_label"]))
+    if node_attrs is not None:
+        for j in range(node_attrs.shape[1]):
+            node_cols[f"attr_{j}"] = node_attrs[order, j]
 
-    # Prepare edges_df with local node ids
-    edge_rows: list[dict] = []
-    for u, v in edges_global:
-        gu, lu = global_to_local.get(int(u), (None, None))
-        gv, lv = global_to_local.get(int(v), (None, None))
-        if gu is None or gv is None:
-            continue
-        if gu != gv:
-            # TU datasets should not have cross-graph edges; ignore if present.
-            continue
-        edge_rows.append({"graph_id": int(gu), "src": int(lu), "dst": int(lv)})
+    nodes_df = pd.DataFrame(node_cols)
 
-    edges_df = pd.DataFrame(edge_rows)
+    # Prepare edges_df with local node ids
+    u = edges_global[:, 0] - 1
+    v = edges_global[:, 1] - 1
+    known = (u >= 0) & (u < n_nodes) & (v >= 0) & (v < n_nodes)
+    u, v = u[known], v[known]
+    # TU datasets should not have cross-graph edges; ignore if present.
+    keep = (local_id[u] >= 0) & (local_id[v] >= 0) & (graph_indicator[u] == graph_indicator[v])
+    u, v = u[keep], v[keep]
+
+    edges_df = pd.DataFrame(
+        {
+            "graph_id": graph_indicator[u].astype(EDGE_DTYPES["graph_id"]),
+            "src": local_id[u].astype(EDGE_DTYPES["src"]),
+            "dst": local_id[v].astype(EDGE_DTYPES["dst"]),
+        }
+    )
 
-    graph_labels_df = pd.DataFrame({"graph_id": np.arange(1, n_graphs + 1, dtype=int), "target": targets})
+    graph_labels_df = pd.DataFrame(
+        {"graph_id": np.arange(1, n_graphs + 1, dtype=SPLIT_DTYPES["graph_id"]), "target": targets}
+    )
 
     meta = {
         "zip_path": str(zip_path),
@@ -222,18 +237,56 @@ def _download_if_needed(dataset: str, raw_zip: Path, url: str | None) -> None:
     if raw_zip.exists():
         return
 
-    download_url = url or _DEFAULT_URLS.get(dataset)
-    if not download_url:
-        raise ValueError(f"No default download URL configured for dataset={dataset}")
+    download_url = url or get_dataset(dataset).url
 
     print(f"Downloading {dataset} from: {download_url}")
     print(f"To: {raw_zip}")
     urllib.request.urlretrieve(download_url, raw_zip)  # noqa: S310
 
 
+def prepare_dataset(
+    raw_zip: Path,
+    prefix: str,
+    out_dir: Path,
+    cfg: SplitConfig,
+    write_test_labels: bool,
+    profiler: Profiler | None = None,
+    canonical: bool = False,
+) -> dict:
+    """Parses a TU zip and writes the prepared CSV layout (nodes, edges, splits, meta) to out_dir.
+
+    With canonical=True, edges.csv stores each undirected edge once (see canonical_edges).
+    """
+
+    profiler = profiler or Profiler("prepare_data")
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with profiler.stage("load"):
+        nodes_df, edges_df, graph_labels_df, meta = _load_tu_dataset(raw_zip, prefix)
+        if canonical:
+            edges_df = canonical_edges(edges_df)
+            meta["n_edges"] = int(len(edges_df))
+        meta["canonical_edges"] = bool(canonical)
+    print(memory_report("nodes", nodes_df))
+    print(memory_report("edges", edges_df))
+
+    with profiler.stage("write"):
+        _write_splits(graph_labels_df, cfg, out_dir, write_test_labels=write_test_labels)
+
+        nodes_df.to_csv(out_dir / "nodes.csv", index=False)
+        edges_df.to_csv(out_dir / "edges.csv", index=False)
+
+        meta_out = {
+            **meta,
+            "split": {"seed": cfg.seed, "test_frac": cfg.test_frac, "val_frac": cfg.val_frac},
+        }
+        (out_dir / "meta.json").write_text(json.dumps(meta_out, indent=2), encoding="utf-8")
+    return meta_out
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Prepare TU graph classification data for the mini-competition.")
-    parser.add_argument("--dataset", choices=["proteins", "mutag"], required=True)
+    parser.add_argument("--dataset", choices=dataset_names(), required=True)
     parser.add_argument(
         "--raw-zip",
         type=Path,
@@ -260,11 +313,18 @@ def main() -> int:
         action="store_true",
         help="Write test_labels.csv (organizers only; should not be committed).",
     )
+    parser.add_argument(
+        "--canonical-edges",
+        action="store_true",
+        help="Store each undirected edge once (src <= dst, deduplicated) instead of both TU directions.",
+    )
+    add_profile_args(parser)
 
     args = parser.parse_args()
+    profiler = Profiler.from_args(args, command="prepare_data")
 
     dataset = str(args.dataset)
-    prefix = "PROTEINS" if dataset == "proteins" else "MUTAG"
+    prefix = get_dataset(dataset).tu_name
 
     here = Path(__file__).resolve()
     challenge_root = here.parents[1]
@@ -286,19 +346,16 @@ def main() -> int:
         out_dir = challenge_root / "data" / dataset
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    nodes_df, edges_df, graph_labels_df, meta = _load_tu_dataset(raw_zip, prefix)
-
     cfg = SplitConfig(seed=int(args.seed), test_frac=float(args.test_frac), val_frac=float(args.val_frac))
-    _write_splits(graph_labels_df, cfg, out_dir, write_test_labels=bool(args.write_test_labels))
-
-    nodes_df.to_csv(out_dir / "nodes.csv", index=False)
-    edges_df.to_csv(out_dir / "edges.csv", index=False)
-
-    meta_out = {
-        **meta,
-        "split": {"seed": cfg.seed, "test_frac": cfg.test_frac, "val_frac": cfg.val_frac},
-    }
-    (out_dir / "meta.json").write_text(json.dumps(meta_out, indent=2), encoding="utf-8")
+    prepare_dataset(
+        raw_zip,
+        prefix,
+        out_dir,
+        cfg,
+        write_test_labels=bool(args.write_test_labels),
+        profiler=profiler,
+        canonical=bool(args.canonical_edges),
+    )
 
     print(f"Wrote prepared dataset to: {out_dir}")
     print("Files:")
@@ -309,6 +366,7 @@ def main() -> int:
     if args.write_test_labels:
         print(f" - {out_dir / 'test_labels.csv'}")
 
+    profiler.finish()
     return 0
 
 
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is reported as null
+    resource = None  # type: ignore[assignment]
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="JSON_PATH",
+        help="Emit a JSON profile (per-stage wall/CPU time, peak RSS). Written to stderr unless a path is given.",
+    )
+    group.add_argument(
+        "--profile-pstats",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Also dump cProfile stats to PATH (.pstats). Implies --profile.",
+    )
+    group.add_argument(
+        "--profile-trace-memory",
+        action="store_true",
+        help="Also trace allocations with tracemalloc (per-stage traced peaks, top allocation sites). "
+        "Several times slower, so timings are then not representative. Implies --profile.",
+    )
+    group.add_argument("--profile-top", type=int, default=10, help="Number of top allocation sites to report.")
+
+
+def peak_rss_mb(children: bool = False) -> float | None:
+    """Peak resident set size of this process, or of its largest waited-for child process."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 3)
+    return round(peak / 1024, 3)
+
+
+class _StageRss:
+    """Peak RSS since the last reset(), so each stage can report its own high-water mark.
+
+    A background thread samples VmRSS from /proc/self/status; the kernel's own counters
+    (VmHWM, ru_maxrss) are only read, never reset. Where /proc is unavailable per-stage
+    RSS is not reported (method None).
+    """
+
+    _STATUS = Path("/proc/self/status")
+    SAMPLE_INTERVAL_S = 0.01
+
+    def __init__(self) -> None:
+        self._sampled = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.method: str | None = None
+        rss = self._status_bytes("VmRSS")
+        if rss is None:
+            return
+        self.method = "sampled"
+        self._sampled = rss
+        self._thread = threading.Thread(target=self._sample, name="profiler-rss", daemon=True)
+        self._thread.start()
+
+    def _status_bytes(self, field: str) -> int | None:
+        try:
+            for line in self._STATUS.read_text().splitlines():
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.SAMPLE_INTERVAL_S):
+            self._sampled = max(self._sampled, self._status_bytes("VmRSS") or 0)
+
+    def peak(self) -> int | None:
+        if self.method is None:
+            return None
+        return max(self._sampled, self._status_bytes("VmRSS") or 0)
+
+    def reset(self) -> None:
+        if self.method is not None:
+            self._sampled = self._status_bytes("VmRSS") or 0
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+
+
+class Profiler:
+    """Collects per-stage timings and memory for one CLI invocation.
+
+    Disabled profilers (no ``--profile``) make ``stage`` and ``finish`` no-ops, so
+    call sites do not need to branch on whether profiling was requested.
+    """
+
+    def __init__(
+        self,
+        command: str,
+        output: str | None = None,
+        pstats_path: Path | None = None,
+        top_n: int = 10,
+        trace_memory: bool = False,
+    ) -> None:
+        self.command = command
+        self.output = output
+        self.pstats_path = pstats_path
+        self.top_n = int(top_n)
+        self.trace_memory = bool(trace_memory)
+        self.enabled = output is not None or pstats_path is not None or self.trace_memory
+        if self.enabled and self.output is None:
+            self.output = "-"
+
+        self._stages: dict[str, dict] = {}
+        self._open: list[dict] = []
+        self._cprofile: cProfile.Profile | None = None
+        self._traced_peak = 0
+        self._wall0 = 0.0
+        self._cpu0 = 0.0
+        self._rss: _StageRss | None = None
+
+        if self.enabled:
+            self._rss = _StageRss()
+            if self.trace_memory:
+                tracemalloc.start()
+            if self.pstats_path is not None:
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+            self._wall0 = time.perf_counter()
+            self._cpu0 = time.process_time()
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, command: str) -> "Profiler":
+        return cls(
+            command,
+            output=getattr(args, "profile", None),
+            pstats_path=getattr(args, "profile_pstats", None),
+            top_n=getattr(args, "profile_top", 10),
+            trace_memory=getattr(args, "profile_trace_memory", False),
+        )
+
+    def _fold_traced_peak(self) -> None:
+        if not self.trace_memory:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        self._traced_peak = max(self._traced_peak, peak)
+        for frame in self._open:
+            frame["traced_peak"] = max(frame["traced_peak"], peak)
+
+    def _fold_rss_peak(self) -> None:
+        peak = self._rss.peak() if self._rss is not None else None
+        if peak is None:
+            return
+        for frame in self._open:
+            frame["rss_peak"] = max(frame["rss_peak"], peak)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        # Nested stages share tracemalloc's and the RSS sampler's single peak; fold them
+        # into every open stage before resetting so outer stages keep their own high-water mark.
+        self._fold_traced_peak()
+        self._fold_rss_peak()
+        frame = {"traced_peak": 0, "rss_peak": 0}
+        self._open.append(frame)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._rss.reset()
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            self._fold_traced_peak()
+            self._fold_rss_peak()
+            self._open.pop()
+
+            entry = self._stages.setdefault(
+                name, {"name": name, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "traced_peak_mb": 0.0}
+            )
+            entry["calls"] += 1
+            entry["wall_s"] = round(entry["wall_s"] + wall, 6)
+            entry["cpu_s"] = round(entry["cpu_s"] + cpu, 6)
+            if self.trace_memory:
+                entry["traced_peak_mb"] = round(max(entry["traced_peak_mb"], frame["traced_peak"] / (1024 * 1024)), 3)
+            else:
+                entry["traced_peak_mb"] = None
+            if self._rss.method is not None:
+                entry["rss_peak_mb"] = round(max(entry.get("rss_peak_mb") or 0.0, frame["rss_peak"] / (1024 * 1024)), 3)
+            else:
+                entry["rss_peak_mb"] = None
+
+    def finish(self) -> dict | None:
+        """Stops collection and writes the JSON report. Returns the report (or None when disabled)."""
+
+        if not self.enabled:
+            return None
+
+        wall = time.perf_counter() - self._wall0
+        cpu = time.process_time() - self._cpu0
+        self._rss.close()
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self.pstats_path.parent.mkdir(parents=True, exist_ok=True)
+            self._cprofile.dump_stats(str(self.pstats_path))
+
+        top: list[dict] = []
+        if self.trace_memory:
+            self._fold_traced_peak()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            top = [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_mb": round(stat.size / (1024 * 1024), 3),
+                    "count": int(stat.count),
+                }
+                for stat in snapshot.statistics("lineno")[: self.top_n]
+            ]
+
+        report = {
+            "command": self.command,
+            "argv": sys.argv[1:],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "total": {
+                "wall_s": round(wall, 6),
+                "cpu_s": round(cpu, 6),
+                "rss_peak_mb": peak_rss_mb(),
+                "traced_peak_mb": round(self._traced_peak / (1024 * 1024), 3) if self.trace_memory else None,
+            },
+            "stages": list(self._stages.values()),
+            "top_allocations": top,
+            "pstats": str(self.pstats_path) if self.pstats_path is not None else None,
+        }
+
+        text = json.dumps(report, indent=2)
+        if self.output == "-":
+            print(text, file=sys.stderr)
+        else:
+            out_path = Path(self.output)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out_path.write_text(text + "\n", encoding="utf-8")
+        self.enabled = False
+        return report
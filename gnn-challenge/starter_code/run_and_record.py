@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from profiling import peak_rss_mb
+
+
+CHALLENGE_ROOT = Path(__file__).resolve().parents[1]
+INBOX_DIR = CHALLENGE_ROOT / "submissions" / "inbox"
+
+
+def _process_tree(pid: int) -> list[int]:
+    """pid and its live descendants, via /proc/<pid>/task/<tid>/children (Linux only)."""
+
+    tree, queue = [], [pid]
+    while queue:
+        current = queue.pop()
+        tree.append(current)
+        for children in Path(f"/proc/{current}/task").glob("*/children"):
+            try:
+                queue.extend(int(child) for child in children.read_text().split())
+            except OSError:
+                pass
+    return tree
+
+
+def _thread_count(pid: int) -> int | None:
+    """Threads across the process tree rooted at pid; None where /proc is unavailable."""
+
+    if not Path(f"/proc/{pid}/status").exists():
+        return None
+    total = 0
+    for member in _process_tree(pid):
+        try:
+            for line in Path(f"/proc/{member}/status").read_text().splitlines():
+                if line.startswith("Threads:"):
+                    total += int(line.split()[1])
+                    break
+        except OSError:
+            pass  # exited between listing and reading
+    return total
+
+
+def run_measured(command: list[str], poll_interval: float) -> dict:
+    """Runs command to completion and returns wall/CPU time, peak RSS and the peak thread count."""
+
+    cpu_before = os.times()
+    start = time.perf_counter()
+    proc = subprocess.Popen(command)
+    max_threads = None
+    while proc.poll() is None:
+        threads = _thread_count(proc.pid)
+        if threads is not None:
+            max_threads = max(max_threads or 0, threads)
+        time.sleep(poll_interval)
+    wall_s = time.perf_counter() - start
+    cpu_after = os.times()
+
+    return {
+        "command": command,
+        "exit_code": proc.returncode,
+        "wall_s": round(wall_s, 3),
+        "cpu_s": round(
+            (cpu_after.children_user - cpu_before.children_user)
+            + (cpu_after.children_system - cpu_before.children_system),
+            3,
+        ),
+        "peak_rss_mb": peak_rss_mb(children=True),
+        "max_threads": max_threads,
+    }
+
+
+def record(metadata_path: Path, measurement: dict, defaults: dict[str, str]) -> dict:
+    """Merges one measured command into metadata.json; runtime_minutes accumulates over commands."""
+
+    metadata = json.loads(metadata_path.read_text(encoding="utf-8")) if metadata_path.exists() else {}
+    for key, value in defaults.items():
+        if value and not str(metadata.get(key, "")).strip():
+            metadata[key] = value
+
+    measured = metadata.get("measured") or {
+        "wall_s": 0.0,
+        "cpu_s": 0.0,
+        "peak_rss_mb": None,
+        "max_threads": None,
+        "commands": [],
+    }
+    measured["commands"].append(measurement)
+    measured["wall_s"] = round(measured["wall_s"] + measurement["wall_s"], 3)
+    measured["cpu_s"] = round(measured["cpu_s"] + measurement["cpu_s"], 3)
+    for key in ("peak_rss_mb", "max_threads"):
+        values = [v for v in (measured[key], measurement[key]) if v is not None]
+        measured[key] = max(values) if values else None
+    metadata["measured"] = measured
+    metadata["runtime_minutes"] = round(measured["wall_s"] / 60.0, 2)
+
+    metadata_path.parent.mkdir(parents=True, exist_ok=True)
+    metadata_path.write_text(json.dumps(metadata, indent=2) + "\n", encoding="utf-8")
+    return metadata
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Run a training/prediction command and record its wall time, CPU time, peak RSS and "
+        "thread count in submissions/inbox/<team>/<run>/metadata.json.",
+        usage="%(prog)s --team TEAM --run RUN [options] -- COMMAND [ARGS...]",
+    )
+    parser.add_argument("--team", required=True)
+    parser.add_argument("--run", required=True, help="Run id (folder name under the team's inbox folder).")
+    parser.add_argument("--model", default="", help="Fills metadata.model if it is not set yet.")
+    parser.add_argument(
+        "--model-type", choices=["human", "llm-only", "human+llm"], default=None, help="Fills metadata.model_type if unset."
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Seconds between thread-count samples.")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Command to run; {run_dir} expands to the run folder.")
+    args = parser.parse_args()
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("missing command to run (put it after --)")
+
+    run_dir = INBOX_DIR / args.team / args.run
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    measurement = run_measured([part.replace("{run_dir}", str(run_dir)) for part in command], args.poll_interval)
+    # metadata.json is committed with the submission: keep the placeholder rather than local paths.
+    measurement["command"] = command
+    if measurement["exit_code"] != 0:
+        print(f"Command failed with exit code {measurement['exit_code']}; metadata not updated.", file=sys.stderr)
+        return measurement["exit_code"]
+
+    metadata = record(
+        run_dir / "metadata.json",
+        measurement,
+        {"team": args.team, "model": args.model, "model_type": args.model_type or ""},
+    )
+    print(
+        f"Recorded: wall={measurement['wall_s']:.1f}s cpu={measurement['cpu_s']:.1f}s "
+        f"peak_rss={measurement['peak_rss_mb']} MB threads={measurement['max_threads']} "
+        f"(runtime_minutes={metadata['runtime_minutes']}) -> {run_dir / 'metadata.json'}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
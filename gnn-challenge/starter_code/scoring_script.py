@@ -6,16 +6,19 @@ from pathlib import Path
 import pandas as pd
 from sklearn.metrics import f1_score
 
+from dataset_registry import dataset_names
+
 
 def main(argv: list[str]) -> int:
+    names = dataset_names()
     if len(argv) not in {2, 3}:
-        print("Usage: python scoring_script.py <path/to/submission.csv> [proteins|mutag]")
+        print(f"Usage: python scoring_script.py <path/to/submission.csv> [{'|'.join(names)}]")
         return 2
 
     submission_file = Path(argv[1])
-    dataset = "proteins" if len(argv) == 2 else str(argv[2])
-    if dataset not in {"proteins", "mutag"}:
-        print("Dataset must be one of: proteins, mutag")
+    dataset = names[0] if len(argv) == 2 else str(argv[2])
+    if dataset not in names:
+        print(f"Dataset must be one of: {', '.join(names)}")
         return 2
 
     here = Path(__file__).resolve()
@@ -1,21 +1,132 @@
 from __future__ import annotations
 
+import itertools
 import subprocess
 import sys
+import warnings
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+from sklearn import metrics as skm
+
+from dataset_registry import dataset_names
+from graph_baseline_utils import count_motifs, graph_csr
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "competition"))
+from metrics import classification_report  # noqa: E402
+
 
 def run(cmd: list[str]) -> None:
     print("$", " ".join(cmd))
     subprocess.run(cmd, check=True)
 
 
+def check_metrics(n_cases: int = 300, seed: int = 0) -> None:
+    """The official metric is hand-rolled from a bincount confusion matrix; keep it equal to sklearn."""
+
+    rng = np.random.default_rng(seed)
+    cases = [
+        (np.array([0, 0, 1, 1]), np.array([0, 2, 1, 1])),  # class 2 appears only in the predictions
+        (np.array([1, 1, 1]), np.array([1, 1, 1])),  # single class
+        (np.array([0, 1, 0, 1]), np.array([1, 0, 1, 0])),  # all wrong
+    ]
+    for _ in range(n_cases):
+        k = int(rng.integers(2, 5))
+        n = int(rng.integers(1, 60))
+        cases.append((rng.integers(0, k, n), rng.integers(0, k + int(rng.integers(0, 2)), n)))
+
+    for y_true, y_pred in cases:
+        report = classification_report(y_true, y_pred)
+        with warnings.catch_warnings():
+            # sklearn warns on exactly the degenerate cases checked here.
+            warnings.simplefilter("ignore")
+            expected = {
+                "macro_f1": skm.f1_score(y_true, y_pred, average="macro", zero_division=0),
+                "weighted_f1": skm.f1_score(y_true, y_pred, average="weighted", zero_division=0),
+                "micro_f1": skm.f1_score(y_true, y_pred, average="micro", zero_division=0),
+                "mcc": skm.matthews_corrcoef(y_true, y_pred),
+                "balanced_accuracy": skm.balanced_accuracy_score(y_true, y_pred),
+                "accuracy": skm.accuracy_score(y_true, y_pred),
+            }
+            expected_cm = skm.confusion_matrix(y_true, y_pred).tolist()
+        for key, value in expected.items():
+            if not np.isclose(report[key], value, rtol=0.0, atol=1e-12):
+                raise AssertionError(f"{key} mismatch for y_true={y_true}, y_pred={y_pred}: {report[key]} != {value}")
+        if report["confusion_matrix"] != expected_cm:
+            raise AssertionError(f"confusion matrix mismatch for y_true={y_true}, y_pred={y_pred}")
+    try:
+        classification_report(np.array([0, 1, 0, 1]), np.array([0, 0.5, 0, 1]))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("fractional predictions were scored instead of rejected")
+    print(f"OK: metrics match sklearn on {len(cases)} label vectors")
+
+
+def _brute_force_motifs(adj: np.ndarray) -> dict[str, int]:
+    n = adj.shape[0]
+    degrees = adj.sum(axis=1)
+    edge = lambda a, b: bool(adj[a, b])  # noqa: E731
+    cycles4 = 0
+    for a, b, c, d in itertools.combinations(range(n), 4):
+        for cycle in ((a, b, c, d), (a, b, d, c), (a, c, b, d)):
+            cycles4 += all(edge(cycle[i], cycle[(i + 1) % 4]) for i in range(4))
+    return {
+        "motif_wedges": int(sum(d * (d - 1) // 2 for d in degrees)),
+        "motif_stars3": int(sum(d * (d - 1) * (d - 2) // 6 for d in degrees)),
+        "motif_triangles": sum(
+            all(edge(x, y) for x, y in itertools.combinations(t, 2)) for t in itertools.combinations(range(n), 3)
+        ),
+        "motif_cycles4": cycles4,
+        "motif_cliques4": sum(
+            all(edge(x, y) for x, y in itertools.combinations(q, 2)) for q in itertools.combinations(range(n), 4)
+        ),
+    }
+
+
+def check_motifs(n_graphs: int = 40, seed: int = 0) -> None:
+    """count_motifs (blocked A @ A and the 4-clique join) against enumeration on small random graphs."""
+
+    rng = np.random.default_rng(seed)
+    nodes, edges = [], []
+    for graph_id in range(1, n_graphs + 1):
+        n = int(rng.integers(1, 10))
+        density = rng.random()
+        nodes += [(graph_id, i) for i in range(n)]
+        for i in range(n):
+            if rng.random() < 0.1:
+                edges.append((graph_id, i, i))  # self-loops are not part of any motif
+            for j in range(i + 1, n):
+                if rng.random() < density:
+                    edges += [(graph_id, i, j), (graph_id, j, i)]  # TU lists both directions
+    csr = graph_csr(
+        pd.DataFrame(nodes, columns=["graph_id", "node_id"]), pd.DataFrame(edges, columns=["graph_id", "src", "dst"])
+    )
+
+    # A tiny block size forces the blocked A @ A path through many blocks.
+    for block_paths in (1 << 24, 16):
+        motifs = count_motifs(csr, block_paths=block_paths)
+        for k in range(csr.graph_ids.shape[0]):
+            adj = csr.graph(k).toarray()
+            for key, value in _brute_force_motifs(adj).items():
+                if motifs[key].iloc[k] != value:
+                    raise AssertionError(
+                        f"{key} mismatch for graph {csr.graph_ids[k]} (block_paths={block_paths}): "
+                        f"{motifs[key].iloc[k]} != {value}"
+                    )
+    print(f"OK: motif counts match brute force on {n_graphs} random graphs")
+
+
 def main() -> int:
     here = Path(__file__).resolve()
     root = here.parents[1]
     py = sys.executable
 
-    datasets = ["proteins", "mutag"]
+    check_metrics()
+    check_motifs()
+
+    datasets = dataset_names()
     for dataset in datasets:
         data_dir = root / "data" / dataset
         if not data_dir.exists():
@@ -5,11 +5,13 @@ from pathlib import Path
 
 import pandas as pd
 
+from dataset_registry import dataset_names
+
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Validate a submission file (no labels required).")
     parser.add_argument("submission", type=Path)
-    parser.add_argument("--dataset", choices=["proteins", "mutag"], default="proteins")
+    parser.add_argument("--dataset", choices=dataset_names(), default=dataset_names()[0])
     args = parser.parse_args()
 
     here = Path(__file__).resolve()
@@ -41,6 +43,8 @@ def main() -> int:
     # Basic type sanity (allow ints stored as floats in CSV, but must be numeric)
     if not pd.api.types.is_numeric_dtype(submission["target"]):
         raise SystemExit("Submission target column must be numeric class ids")
+    if (submission["target"] != submission["target"].round()).any():
+        raise SystemExit("Submission target column must be integer class ids, got non-integer values")
 
     print("OK: submission format looks valid")
     return 0